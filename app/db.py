@@ -1,17 +1,249 @@
 # app/db.py
+import asyncio
+import itertools
+import logging
+import math
 import os
+import time
+from typing import Callable, Dict, List, Optional
+from uuid import uuid4
+import asyncpg
 from dotenv import load_dotenv
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+from .metrics import DB_READ_ROUTING, DB_REPLICA_LAG, InstrumentedAsyncPool, instrument_engine
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL")
+# LISTEN necesita una conexión de sesión: con PgBouncer en modo transaction apuntar directo a Postgres
+DATABASE_LISTEN_URL = os.getenv("DATABASE_LISTEN_URL") or DATABASE_URL
+# réplicas de lectura opcionales, separadas por coma (mismo dialecto postgresql+asyncpg)
+DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+# --------------------
+# Pool (por worker de gunicorn: conexiones totales = workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW))
+# --------------------
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # espera máx. de checkout (s)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # reabrir conexiones más viejas (s); -1 = nunca
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_COMMAND_TIMEOUT = float(os.getenv("DB_COMMAND_TIMEOUT", "30"))  # timeout por sentencia en asyncpg (s)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))  # prepared statements por conexión
+DB_PGBOUNCER = _env_bool("DB_PGBOUNCER", False)  # PgBouncer en modo transaction: sin caché de prepared statements
+
+
+def _connect_args() -> dict:
+    if DB_PGBOUNCER:
+        # cada prepared statement con nombre único: PgBouncer puede cambiar de backend entre transacciones
+        return {
+            "command_timeout": DB_COMMAND_TIMEOUT,
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {
+        "command_timeout": DB_COMMAND_TIMEOUT,
+        "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+    }
+
+
+def _create_engine(url: str, name: str):
+    eng = create_async_engine(
+        url,
+        future=True,
+        echo=False,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args=_connect_args(),
+    )
+    instrument_engine(eng, name)
+    return eng
+
 
-engine = create_async_engine(DATABASE_URL, future=True, echo=False)
+engine = _create_engine(DATABASE_URL, "primary")
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 Base = declarative_base()
 
 async def get_session():
     async with AsyncSessionLocal() as session:
         yield session
+
+
+# --------------------
+# Réplicas de lectura
+# --------------------
+DB_REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "5"))  # segundos; más retraso => primaria
+DB_REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_LAG_CHECK_INTERVAL", "2"))
+DB_READ_YOUR_WRITES_SECONDS = int(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+
+READ_YOUR_WRITES_COOKIE = "policy_rw_until"  # epoch hasta el que las lecturas del cliente van a la primaria
+CONSISTENCY_HEADER = "X-Consistency"  # "strong" fuerza la primaria
+
+# 0 si la réplica ya aplicó todo lo recibido; si no, antigüedad de la última transacción aplicada
+_REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def _cookie_epoch(value: Optional[str]) -> float:
+    try:
+        return float(value) if value else 0.0
+    except ValueError:
+        return 0.0
+
+
+class ReplicaRouter:
+    """Reparte sesiones de lectura entre réplicas (round-robin) y cae a la primaria por lag o stickiness."""
+
+    def __init__(self, urls: List[str]):
+        self.engines = {f"replica{i}": _create_engine(url, f"replica{i}") for i, url in enumerate(urls)}
+        self.sessionmakers = {
+            name: sessionmaker(eng, class_=AsyncSession, expire_on_commit=False) for name, eng in self.engines.items()
+        }
+        self.lag: Dict[str, float] = {name: math.inf for name in self.engines}  # desconocido => no se usa
+        self._rr = itertools.cycle(list(self.engines))
+        self._task: Optional[asyncio.Task] = None
+
+    def choose(self, request: Optional[Request]) -> sessionmaker:
+        if not self.engines:
+            return AsyncSessionLocal
+        if request is not None:
+            if request.headers.get(CONSISTENCY_HEADER, "").lower() == "strong":
+                DB_READ_ROUTING.inc("primary", "consistency")
+                return AsyncSessionLocal
+            if _cookie_epoch(request.cookies.get(READ_YOUR_WRITES_COOKIE)) > time.time():
+                DB_READ_ROUTING.inc("primary", "read_your_writes")
+                return AsyncSessionLocal
+        for _ in range(len(self.engines)):
+            name = next(self._rr)
+            if self.lag[name] <= DB_REPLICA_MAX_LAG:
+                DB_READ_ROUTING.inc(name, "replica")
+                return self.sessionmakers[name]
+        DB_READ_ROUTING.inc("primary", "replica_lag")
+        return AsyncSessionLocal
+
+    async def _check_lag(self, name: str):
+        try:
+            async with self.engines[name].connect() as conn:
+                lag = float((await conn.execute(_REPLICA_LAG_SQL)).scalar() or 0)
+        except Exception as exc:  # réplica caída o inalcanzable: fuera de la rotación
+            logger.warning("replica %s lag check failed: %s", name, exc)
+            lag = math.inf
+        self.lag[name] = lag
+        DB_REPLICA_LAG.set(lag, name)
+
+    async def _monitor(self):
+        while True:
+            await asyncio.gather(*(self._check_lag(name) for name in self.engines))
+            await asyncio.sleep(DB_REPLICA_LAG_CHECK_INTERVAL)
+
+    async def start(self):
+        if self.engines and self._task is None:
+            self._task = asyncio.create_task(self._monitor())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for eng in self.engines.values():
+            await eng.dispose()
+
+
+replica_router = ReplicaRouter(DATABASE_REPLICA_URLS)
+
+
+def read_sessionmaker(request: Optional[Request] = None) -> sessionmaker:
+    return replica_router.choose(request)
+
+
+def read_target(maker: sessionmaker) -> str:
+    """"primary" o "replica" (cualquier réplica sana sirve igual): parte de la clave de las lecturas compartidas."""
+    return "primary" if maker is AsyncSessionLocal else "replica"
+
+
+async def get_read_session(request: Request):
+    """Como get_session, pero para handlers de solo lectura: puede servirse desde una réplica."""
+    async with read_sessionmaker(request)() as session:
+        yield session
+
+
+def remember_write(response: Response):
+    """Dependencia de handlers que mutan: las lecturas del cliente van a la primaria durante un rato."""
+    if replica_router.engines:
+        until = int(time.time()) + DB_READ_YOUR_WRITES_SECONDS
+        response.set_cookie(READ_YOUR_WRITES_COOKIE, str(until), max_age=DB_READ_YOUR_WRITES_SECONDS, httponly=True)
+
+
+# --------------------
+# LISTEN/NOTIFY
+# --------------------
+class NotifyListener:
+    """Conexión asyncpg dedicada que escucha un canal y llama a ``on_notify()`` por cada notificación.
+
+    Si la conexión se pierde también llama a ``on_notify()`` (pudo perder notificaciones) y reintenta.
+    """
+
+    def __init__(self, channel: str, on_notify: Callable[[], None], retry_delay: float = 5.0):
+        self.channel = channel
+        self.on_notify = on_notify
+        self.retry_delay = retry_delay
+        self._task: Optional[asyncio.Task] = None
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self.on_notify()
+
+    async def _run(self):
+        dsn = make_url(DATABASE_LISTEN_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            lost = asyncio.get_running_loop().create_future()
+            try:
+                conn = await asyncpg.connect(dsn)
+                try:
+                    conn.add_termination_listener(lambda _conn: lost.done() or lost.set_result(None))
+                    await conn.add_listener(self.channel, self._on_notify)
+                    await lost
+                finally:
+                    await conn.close()
+            except Exception as exc:
+                # cualquier fallo (InterfaceError, timeout al conectar...) reintenta: si la tarea
+                # terminara, este worker dejaría de invalidar/despertar hasta reiniciarse.
+                # CancelledError no es Exception: stop() sigue funcionando
+                logger.warning("%s listener disconnected: %s: %s", self.channel, exc.__class__.__name__, exc)
+            self.on_notify()
+            await asyncio.sleep(self.retry_delay)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
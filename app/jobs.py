@@ -0,0 +1,186 @@
+# app/jobs.py
+"""Operaciones masivas en segundo plano con estado persistido en la tabla job.
+
+Cada tipo de job (JobKind) aporta ``count`` (estimación inicial) y ``step`` (un lote set-based a partir
+del cursor). El runner ejecuta cada lote en su propia transacción junto con la actualización del
+progreso, así que los locks duran lo que dura un lote y el progreso nunca se adelanta a los datos.
+El job corre en el worker que lo creó; GET /jobs/{id} lo lee de la base desde cualquier worker.
+
+updated_at es el latido: se renueva en cada lote. Si el worker muere sin apagado ordenado (SIGKILL,
+OOM, timeout de gunicorn), ``reap`` pasa a failed los jobs sin latido desde hace JOB_STALE_AFTER
+segundos (al arrancar cada worker y al consultar o cancelar el job). Cada lote confirma solo si su
+job sigue running, así que un job recogido por error no vuelve a escribir.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from . import models
+from .db import AsyncSessionLocal
+from .metrics import detach_request_stats
+
+logger = logging.getLogger(__name__)
+
+JOB_CHUNK_SIZE = int(os.getenv("JOB_CHUNK_SIZE", "1000"))  # filas por transacción
+JOB_CHUNK_PAUSE = float(os.getenv("JOB_CHUNK_PAUSE", "0"))  # segundos entre lotes (cede la base al tráfico normal)
+# segundos sin latido para dar un job por perdido; debe superar el lote más lento más JOB_CHUNK_PAUSE
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "300"))
+
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+ACTIVE_STATUSES = ("queued", "running")
+
+# step(db, params, cursor, chunk_size) -> (filas procesadas, nuevo cursor); 0 filas = terminado
+StepFn = Callable[[AsyncSession, Dict[str, Any], int, int], Awaitable[Tuple[int, int]]]
+CountFn = Callable[[AsyncSession, Dict[str, Any]], Awaitable[int]]
+
+
+class JobKind:
+    def __init__(self, name: str, count: CountFn, step: StepFn):
+        self.name = name
+        self.count = count
+        self.step = step
+
+
+JOB_KINDS: Dict[str, JobKind] = {}
+
+
+def register(name: str, count: CountFn, step: StepFn):
+    JOB_KINDS[name] = JobKind(name, count, step)
+
+
+class JobRunner:
+    def __init__(self, chunk_size: int = JOB_CHUNK_SIZE, pause: float = JOB_CHUNK_PAUSE, stale_after: float = JOB_STALE_AFTER):
+        self.chunk_size = chunk_size
+        self.pause = pause
+        self.stale_after = stale_after
+        self._tasks: Set[asyncio.Task] = set()  # referencias fuertes: asyncio solo guarda débiles
+
+    async def submit(self, db: AsyncSession, kind: str, params: Dict[str, Any]) -> models.Job:
+        """Crea el job (commit incluido) y lo lanza en este worker."""
+        res = await db.execute(insert(models.Job).values(kind=kind, params=params).returning(models.Job))
+        job = res.scalar_one()
+        await db.commit()
+        task = asyncio.create_task(self._run(job.id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _set(self, db: AsyncSession, job_id: int, *conditions, **values) -> bool:
+        res = await db.execute(
+            update(models.Job).where(models.Job.id == job_id, *conditions)
+            .values(updated_at=func.now(), **values)
+            .returning(models.Job.id)
+        )
+        return res.scalar_one_or_none() is not None
+
+    async def _set_running(self, db: AsyncSession, job_id: int, **values) -> bool:
+        # False: el job ya no es nuestro (reap lo dio por perdido); no se confirma nada más
+        if await self._set(db, job_id, models.Job.status == "running", **values):
+            return True
+        await db.rollback()
+        logger.warning("job %s is no longer running (reaped?); stopping", job_id)
+        return False
+
+    async def _run(self, job_id: int):
+        detach_request_stats()  # X-DB-Statements de la petición que lo creó no incluye los lotes
+        async with AsyncSessionLocal() as db:
+            try:
+                job = (await db.execute(select(models.Job).where(models.Job.id == job_id))).scalar_one()
+                kind = JOB_KINDS[job.kind]
+                total = await kind.count(db, job.params)
+                if not await self._set(db, job_id, models.Job.status == "queued", status="running", started_at=func.now(), total=total):
+                    await db.rollback()
+                    return
+                await db.commit()
+
+                cursor = job.cursor
+                while True:
+                    cancel = (await db.execute(select(models.Job.cancel_requested).where(models.Job.id == job_id))).scalar()
+                    if cancel:
+                        if await self._set_running(db, job_id, status="cancelled", finished_at=func.now()):
+                            await db.commit()
+                        return
+                    processed, cursor = await kind.step(db, job.params, cursor, self.chunk_size)
+                    if not processed:
+                        if await self._set_running(db, job_id, status="succeeded", finished_at=func.now()):
+                            await db.commit()
+                        return
+                    # lote y progreso en la misma transacción (el lote se descarta si el job ya no es running)
+                    if not await self._set_running(db, job_id, processed=models.Job.processed + processed, cursor=cursor):
+                        return
+                    await db.commit()
+                    if self.pause:
+                        await asyncio.sleep(self.pause)
+            except asyncio.CancelledError:
+                await db.rollback()
+                await self._mark_failed(job_id, "Interrupted by worker shutdown")
+                raise
+            except Exception as exc:
+                logger.exception("job %s failed", job_id)
+                await db.rollback()
+                await self._mark_failed(job_id, f"{exc.__class__.__name__}: {exc}")
+
+    async def _mark_failed(self, job_id: int, error: str):
+        async with AsyncSessionLocal() as db:
+            await self._set(db, job_id, models.Job.status.in_(ACTIVE_STATUSES), status="failed", error=error, finished_at=func.now())
+            await db.commit()
+
+    async def reap(self, db: AsyncSession, job_id: Optional[int] = None) -> int:
+        """Pasa a failed los jobs queued/running sin latido desde hace stale_after segundos (todos o uno).
+
+        Son jobs cuyo worker murió sin apagado ordenado: nadie más los va a terminar ni a cancelar.
+        """
+        conditions = [
+            models.Job.status.in_(ACTIVE_STATUSES),
+            models.Job.updated_at < func.now() - func.make_interval(0, 0, 0, 0, 0, 0, self.stale_after),
+        ]
+        if job_id is not None:
+            conditions.append(models.Job.id == job_id)
+        res = await db.execute(
+            update(models.Job).where(*conditions)
+            .values(
+                status="failed",
+                error=f"Worker lost: no heartbeat for {self.stale_after:g}s",
+                finished_at=func.now(),
+                updated_at=func.now(),
+            )
+            .returning(models.Job.id)
+        )
+        reaped = res.scalars().all()
+        await db.commit()
+        if reaped:
+            logger.warning("reaped stale jobs: %s", ", ".join(map(str, reaped)))
+        return len(reaped)
+
+    async def cancel(self, db: AsyncSession, job_id: int) -> Optional[models.Job]:
+        """Pide la cancelación; el runner la aplica antes del siguiente lote (el lote en curso se completa).
+
+        None si el job no existe o ya terminó.
+        """
+        res = await db.execute(
+            update(models.Job)
+            .where(models.Job.id == job_id, models.Job.status.notin_(FINISHED_STATUSES))
+            .values(cancel_requested=True, updated_at=func.now())
+            .returning(models.Job)
+            .execution_options(populate_existing=True)
+        )
+        job = res.scalar_one_or_none()
+        await db.commit()
+        return job
+
+    async def join(self):
+        """Espera a que terminen los jobs lanzados por este proceso (CLI)."""
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+job_runner = JobRunner()
@@ -1,18 +1,46 @@
 # app/main.py
+import logging
+import time
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
-from .db import engine, Base
-from .routers import products, policy
+from .db import AsyncSessionLocal, engine, replica_router
+from .jobs import job_runner
+from .metrics import MetricsMiddleware, render_metrics
+from .outbox import event_listener
+from .product_cache import product_cache, product_cache_listener
+from .response_cache import policy_response_cache
+from .routers import events, jobs, products, policy
+from .schema_check import check_schema
+
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: crear tablas si no existen
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all, checkfirst=True)
+    # Startup: el esquema lo gestiona Alembic (alembic upgrade head, una vez por despliegue);
+    # cada worker solo comprueba la revisión
+    start = time.perf_counter()
+    await check_schema(engine)
+    # jobs que quedaron running/queued por un worker muerto (SIGKILL, OOM, timeout)
+    async with AsyncSessionLocal() as db:
+        await job_runner.reap(db)
+    # invalidación de la caché de productos entre workers (LISTEN/NOTIFY)
+    await product_cache_listener.start()
+    # long-polls de GET /events (LISTEN/NOTIFY)
+    await event_listener.start()
+    # medición de lag de réplicas (si DATABASE_REPLICA_URLS está definido)
+    await replica_router.start()
+    app.state.startup_seconds = time.perf_counter() - start
+    logger.info("worker started in %.1f ms", app.state.startup_seconds * 1000)
     yield
     # Shutdown: opcional, cerrar engine
+    # jobs en curso de este worker: se cancelan y quedan en failed (ver app/jobs.py)
+    await job_runner.stop()
+    await product_cache_listener.stop()
+    await event_listener.stop()
+    await replica_router.stop()
     await engine.dispose()
 
 app = FastAPI(
@@ -29,12 +57,34 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# latencia por ruta, sentencias y tiempo de DB por petición (ver /metrics)
+app.add_middleware(MetricsMiddleware)
 
 # Routers
 app.include_router(products.router)
 app.include_router(policy.router)
+app.include_router(jobs.router)
+app.include_router(events.router)
 
 # Healthcheck
 @app.get("/", tags=["health"])
 async def root():
     return {"status": "ok"}
+
+
+# Métricas Prometheus (por worker)
+@app.get("/metrics", tags=["health"], response_class=PlainTextResponse)
+async def metrics():
+    cache = product_cache.stats()
+    responses = policy_response_cache.stats()
+    return render_metrics({"primary": engine, **replica_router.engines}, extra={
+        "product_cache_hits_total": ("counter", "Aciertos de la caché de productos.", cache["hits"]),
+        "product_cache_misses_total": ("counter", "Fallos de la caché de productos.", cache["misses"]),
+        "product_cache_evictions_total": ("counter", "Expulsiones LRU de la caché de productos.", cache["evictions"]),
+        "product_cache_invalidations_total": ("counter", "Invalidaciones de la caché de productos.", cache["invalidations"]),
+        "policy_response_cache_hits_total": ("counter", "Aciertos de la caché de respuestas de pólizas.", responses["hits"]),
+        "policy_response_cache_misses_total": ("counter", "Fallos de la caché de respuestas de pólizas.", responses["misses"]),
+        "policy_response_cache_evictions_total": ("counter", "Expulsiones LRU de la caché de respuestas de pólizas.", responses["evictions"]),
+        "app_startup_seconds": ("gauge", "Duración del arranque (lifespan) de este worker.", getattr(app.state, "startup_seconds", 0.0)),
+        "policy_response_cache_bytes": ("gauge", "Bytes ocupados por la caché de respuestas de pólizas.", responses["bytes"]),
+    })
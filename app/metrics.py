@@ -0,0 +1,253 @@
+# app/metrics.py
+import logging
+import os
+import re
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+slow_query_logger = logging.getLogger("app.slow_query")
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))  # umbral del log de consultas lentas
+# añade X-DB-Statements / Server-Timing a cada respuesta (benchmarks; no activar de cara al público)
+EXPOSE_DB_TIMING = os.getenv("EXPOSE_DB_TIMING", "false").strip().lower() in ("1", "true", "yes", "on")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+# --------------------
+# Primitivas (formato de texto Prometheus; métricas por worker)
+# --------------------
+def _fmt_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, doc: str, labels: Tuple[str, ...] = ()):
+        self.name, self.doc, self.labels = name, doc, labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        for values, v in self._values.items():
+            lines.append(f"{self.name}{_fmt_labels(self.labels, values)} {v}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, doc: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name, self.doc, self.labels, self.buckets = name, doc, labels, buckets
+        self._series: Dict[Tuple[str, ...], list] = {}  # valores -> [bucket_counts, sum, count]
+
+    def observe(self, value: float, *label_values: str):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        for values, (counts, total, count) in self._series.items():
+            for bound, c in zip(self.buckets, counts):
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labels, values, le)} {c}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_fmt_labels(self.labels, values, le)} {count}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labels, values)} {total}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labels, values)} {count}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, doc: str, labels: Tuple[str, ...] = ()):
+        self.name, self.doc, self.labels = name, doc, labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *label_values: str):
+        self._values[label_values] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} gauge"]
+        for values, v in self._values.items():
+            lines.append(f"{self.name}{_fmt_labels(self.labels, values)} {v}")
+        return lines
+
+
+def _sample(name: str, doc: str, value: float, kind: str = "gauge") -> List[str]:
+    return [f"# HELP {name} {doc}", f"# TYPE {name} {kind}", f"{name} {value}"]
+
+
+HTTP_REQUESTS = Counter("http_requests_total", "Peticiones HTTP atendidas.", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "Latencia total por ruta.", ("method", "route"))
+HTTP_DB_TIME = Histogram("http_request_db_duration_seconds", "Tiempo en base de datos por petición.", ("method", "route"))
+HTTP_DB_STATEMENTS = Histogram("http_request_db_statements", "Sentencias SQL por petición.", ("method", "route"), STATEMENT_BUCKETS)
+DB_STATEMENTS = Counter("db_statements_total", "Sentencias SQL ejecutadas por engine.", ("engine",))
+DB_SLOW_STATEMENTS = Counter("db_slow_statements_total", "Sentencias SQL por encima de SLOW_QUERY_MS.")
+DB_STATEMENT_TIME = Histogram("db_statement_duration_seconds", "Duración de cada sentencia SQL.")
+POOL_CHECKOUT_WAIT = Histogram("db_pool_checkout_wait_seconds", "Espera para obtener una conexión del pool.")
+DB_READ_ROUTING = Counter("db_read_routing_total", "Sesiones de lectura por destino y motivo.", ("engine", "reason"))
+SINGLEFLIGHT_REQUESTS = Counter("singleflight_requests_total", "Lecturas por grupo de coalescencia (leader: ejecutó la consulta; coalesced: reutilizó una en vuelo).", ("flight", "role"))
+SINGLEFLIGHT_TIMEOUTS = Counter("singleflight_timeouts_total", "Peticiones que agotaron SINGLEFLIGHT_TIMEOUT esperando una lectura compartida.", ("flight",))
+DB_REPLICA_LAG = Gauge("db_replica_lag_seconds", "Retraso de replicación medido (+Inf: réplica no disponible).", ("engine",))
+
+
+# --------------------
+# Estadísticas por petición
+# --------------------
+class RequestStats:
+    __slots__ = ("scope", "statements", "db_time")
+
+    def __init__(self, scope: dict):
+        self.scope = scope  # el router añade scope["route"] al resolver la ruta
+        self.statements = 0
+        self.db_time = 0.0
+
+    @property
+    def route(self) -> str:
+        return getattr(self.scope.get("route"), "path", "unmatched")
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+def detach_request_stats():
+    # tareas lanzadas desde una petición (jobs) heredan su contexto: sus sentencias no son de la petición
+    _request_stats.set(None)
+
+
+_WS = re.compile(r"\s+")
+_CASTS = re.compile(r"::[A-Z ]+(?:\(\d+(?:, ?\d+)?\))?(?:\[\])?")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|(?<![\w$])\d+(?:\.\d+)?\b")
+_PARAM_LISTS = re.compile(r"\((?:\s*\$\d+\s*,)+\s*\$\d+\s*\)")
+
+
+def normalize_sql(statement: str) -> str:
+    """SQL sin casts, literales ni listas de parámetros variables, para agrupar en el log de lentas."""
+    sql = _CASTS.sub("", _WS.sub(" ", statement).strip())
+    sql = _PARAM_LISTS.sub("(...)", sql)
+    return _LITERALS.sub("?", sql)
+
+
+def _record_statement(engine_name: str, statement: str, elapsed: float):
+    DB_STATEMENTS.inc(engine_name)
+    DB_STATEMENT_TIME.observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_time += elapsed
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        DB_SLOW_STATEMENTS.inc()
+        slow_query_logger.warning(
+            "slow query %.1fms route=%s sql=%s",
+            elapsed * 1000, stats.route if stats else "-", normalize_sql(statement),
+        )
+
+
+def instrument_engine(engine, name: str = "primary"):
+    """Cuenta y cronometra cada sentencia del engine (async) en la petición en curso."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        _record_statement(name, statement, time.perf_counter() - conn.info["query_start"].pop())
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Pool por defecto de asyncpg que además mide la espera de checkout."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+# --------------------
+# Middleware ASGI
+# --------------------
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _request_stats.set(stats)
+        status_code = {"value": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code["value"] = message["status"]
+                if EXPOSE_DB_TIMING:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-db-statements", str(stats.statements).encode()),
+                        (b"server-timing", f"db;dur={stats.db_time * 1000:.2f}".encode()),
+                    ]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            method, route = scope["method"], stats.route
+            HTTP_REQUESTS.inc(method, route, str(status_code["value"]))
+            HTTP_LATENCY.observe(elapsed, method, route)
+            HTTP_DB_TIME.observe(stats.db_time, method, route)
+            HTTP_DB_STATEMENTS.observe(stats.statements, method, route)
+            _request_stats.reset(token)
+
+
+def render_metrics(engines: Dict[str, object], extra: Optional[Dict[str, Tuple[str, str, float]]] = None) -> str:
+    """Texto Prometheus. engines: {nombre: AsyncEngine}; extra: {nombre: (tipo, ayuda, valor)} de otros módulos."""
+    lines: List[str] = []
+    for metric in (HTTP_REQUESTS, HTTP_LATENCY, HTTP_DB_TIME, HTTP_DB_STATEMENTS, DB_STATEMENTS, DB_SLOW_STATEMENTS,
+                   DB_STATEMENT_TIME, POOL_CHECKOUT_WAIT, DB_READ_ROUTING, DB_REPLICA_LAG, SINGLEFLIGHT_REQUESTS,
+                   SINGLEFLIGHT_TIMEOUTS):
+        lines.extend(metric.render())
+    pool_size = Gauge("db_pool_size", "Tamaño configurado del pool.", ("engine",))
+    checked_out = Gauge("db_pool_checked_out", "Conexiones en uso.", ("engine",))
+    overflow = Gauge("db_pool_overflow", "Conexiones de overflow abiertas (negativo: hueco hasta pool_size).", ("engine",))
+    for name, engine in engines.items():
+        pool = engine.pool
+        if hasattr(pool, "size"):
+            pool_size.set(pool.size(), name)
+            checked_out.set(pool.checkedout(), name)
+            overflow.set(pool.overflow(), name)
+    for gauge in (pool_size, checked_out, overflow):
+        lines.extend(gauge.render())
+    for name, (kind, doc, value) in (extra or {}).items():
+        lines.extend(_sample(name, doc, value, kind))
+    return "\n".join(lines) + "\n"
@@ -1,7 +1,12 @@
-from sqlalchemy import Column, Integer, String, Numeric, Text, Date, TIMESTAMP, ForeignKey, BigInteger
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Numeric, Text, Date, TIMESTAMP, ForeignKey, BigInteger, Index, Boolean
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func, literal_column, false
 from .db import Base
 
+# El esquema lo crean y migran las migraciones de Alembic (migrations/versions); estos modelos deben
+# reflejarlo (alembic revision --autogenerate compara contra ellos).
+
 # --------------------
 # Product
 # --------------------
@@ -30,6 +35,30 @@ class Policy(Base):
     premium = Column(Numeric(12, 2))
     status = Column(String(50))
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    # se incrementa en cada cambio de la póliza o de sus coberturas/beneficiarios (ETag de las lecturas)
+    version = Column(Integer, nullable=False, server_default="1")
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+    # colecciones hijas: nunca se cargan implícitamente (AsyncSession no soporta lazy IO);
+    # los routers las piden explícitamente con selectinload (un SELECT ... IN por página)
+    coverages = relationship("PolicyCoverage", lazy="raise", passive_deletes="all")
+    beneficiaries = relationship("Beneficiary", lazy="raise", passive_deletes="all")
+
+    # índices para el listado paginado por cursor (ORDER BY created_at, id) según los filtros
+    __table_args__ = (
+        Index("ix_policy_created_at_id", "created_at", "id"),
+        Index("ix_policy_customer_created_at_id", "customer_id", "created_at", "id"),
+        Index("ix_policy_customer_status_created_at_id", "customer_id", "status", "created_at", "id"),
+        Index("ix_policy_agent_created_at_id", "agent_id", "created_at", "id"),
+        Index("ix_policy_agent_status_created_at_id", "agent_id", "status", "created_at", "id"),
+        Index("ix_policy_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_policy_product_id", "product_id"),  # FK a product.code (borrado/alta de productos)
+        # GET /policies/search: prefijo (ILIKE 'x%') y similitud (%) sobre policy_number
+        Index("ix_policy_policy_number_trgm", "policy_number", postgresql_using="gin", postgresql_ops={"policy_number": "gin_trgm_ops"}),
+        # GET /policies/expiring: parciales, solo pólizas activas (entradas en la ventana / cambios desde el cursor)
+        Index("ix_policy_active_end_date_id", "end_date", "id", postgresql_where=literal_column("status = 'ACTIVE'")),
+        Index("ix_policy_active_updated_at_id", "updated_at", "id", postgresql_where=literal_column("status = 'ACTIVE'")),
+    )
 
 # --------------------
 # PolicyCoverage
@@ -43,6 +72,12 @@ class PolicyCoverage(Base):
     coverage_limit = Column(Numeric(14, 2))
     deductible = Column(Numeric(12, 2))
 
+    __table_args__ = (
+        Index("ix_policy_coverage_policy_id", "policy_id"),  # FK: carga de coberturas por póliza
+        # filtro coverageCode de la búsqueda (EXISTS por policy_id)
+        Index("ix_policy_coverage_code_policy_id", "coverage_code", "policy_id"),
+    )
+
 # --------------------
 # Beneficiary
 # --------------------
@@ -55,3 +90,143 @@ class Beneficiary(Base):
     relationship = Column(String(50), nullable=False)  # Ej: hijo, cónyuge, padre
     percentage = Column(Numeric(5, 2))
     contact_info = Column(Text)
+
+    __table_args__ = (
+        Index("ix_beneficiary_policy_id", "policy_id"),  # FK: carga de beneficiarios por póliza
+        # GET /policies/search: prefijo y similitud por palabra (<%) sobre el nombre
+        Index("ix_beneficiary_full_name_trgm", "full_name", postgresql_using="gin", postgresql_ops={"full_name": "gin_trgm_ops"}),
+    )
+
+# --------------------
+# PolicySummary (agregados de cartera para GET /policies/stats)
+# --------------------
+class PolicySummary(Base):
+    """Totales por (product_id, status, agent_id, mes de start_date, mes de end_date), mantenidos por deltas.
+
+    Lo actualiza app/policy_summary.py en la misma transacción que cada alta/cambio/baja de póliza.
+    Las fechas se agrupan por mes: el tamaño lo acotan productos x estados x agentes x pares de meses,
+    no el número de pólizas (con fechas exactas sería casi una fila por cada pocas pólizas).
+    """
+    __tablename__ = "policy_summary"
+    id = Column(BigInteger, primary_key=True)
+    product_id = Column(String(50), nullable=False)
+    status = Column(String(50))
+    agent_id = Column(String(50))
+    start_month = Column(Date)  # primer día del mes de policy.start_date
+    end_month = Column(Date)  # primer día del mes de policy.end_date
+    policy_count = Column(BigInteger, nullable=False, server_default="0")
+    premium_total = Column(Numeric(18, 2), nullable=False, server_default="0")
+    sum_insured_total = Column(Numeric(20, 2), nullable=False, server_default="0")
+
+    # clave única sobre expresiones: los NULL de las dimensiones cuentan como un valor más (ON CONFLICT)
+    __table_args__ = (
+        Index(
+            "ux_policy_summary_key",
+            "product_id",
+            func.coalesce(status, literal_column("''")),
+            func.coalesce(agent_id, literal_column("''")),
+            func.coalesce(start_month, literal_column("'-infinity'::date")),
+            func.coalesce(end_month, literal_column("'-infinity'::date")),
+            unique=True,
+        ),
+    )
+
+# --------------------
+# Job (operaciones masivas en segundo plano, ver app/jobs.py)
+# --------------------
+class Job(Base):
+    __tablename__ = "job"
+    id = Column(BigInteger, primary_key=True)
+    kind = Column(String(50), nullable=False)  # p. ej. policy.bulk_update_status
+    status = Column(String(20), nullable=False, server_default="queued")  # queued|running|succeeded|failed|cancelled
+    params = Column(JSONB, nullable=False)
+    total = Column(BigInteger)  # estimación al empezar (filas que cumplen el filtro)
+    processed = Column(BigInteger, nullable=False, server_default="0")
+    cursor = Column(BigInteger, nullable=False, server_default="0")  # último id procesado (keyset entre lotes)
+    cancel_requested = Column(Boolean, nullable=False, server_default=false())
+    error = Column(Text)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    started_at = Column(TIMESTAMP(timezone=True))
+    finished_at = Column(TIMESTAMP(timezone=True))
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now())  # latido: se actualiza en cada lote
+
+# --------------------
+# Archivo (pólizas fuera de la ventana de retención, ver app/policy_archive.py)
+# --------------------
+class PolicyArchive(Base):
+    """Mismas columnas que Policy más archived_at, particionada por rango de created_at (un año por partición).
+
+    El job de archivado crea la partición de cada año antes de mover filas a ella; la partición
+    DEFAULT (migración 0006) solo recibe lo que no encaje en ninguna. Sin FKs ni unicidad de
+    policy_number: el archivo es de solo lectura y un número archivado se puede reutilizar.
+    """
+    __tablename__ = "policy_archive"
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    policy_number = Column(String(100), nullable=False)
+    customer_id = Column(Integer, nullable=False)
+    product_id = Column(String(50), nullable=False)
+    agent_id = Column(String(50))
+    start_date = Column(Date)
+    end_date = Column(Date)
+    sum_insured = Column(Numeric(14, 2))
+    premium = Column(Numeric(12, 2))
+    status = Column(String(50))
+    created_at = Column(TIMESTAMP(timezone=True), primary_key=True)  # clave de partición: tiene que ir en la PK
+    version = Column(Integer, nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True))
+    archived_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+
+    # mismo orden (created_at, id) que el listado de pólizas vivas, para include_archived=true
+    __table_args__ = (
+        Index("ix_policy_archive_created_at_id", "created_at", "id"),
+        Index("ix_policy_archive_customer_created_at_id", "customer_id", "created_at", "id"),
+        Index("ix_policy_archive_agent_created_at_id", "agent_id", "created_at", "id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+class PolicyCoverageArchive(Base):
+    __tablename__ = "policy_coverage_archive"
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    policy_id = Column(Integer, nullable=False)
+    coverage_code = Column(String(100))
+    coverage_name = Column(String(255))
+    coverage_limit = Column(Numeric(14, 2))
+    deductible = Column(Numeric(12, 2))
+
+    __table_args__ = (
+        Index("ix_policy_coverage_archive_policy_id", "policy_id"),
+    )
+
+class BeneficiaryArchive(Base):
+    __tablename__ = "beneficiary_archive"
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    policy_id = Column(BigInteger, nullable=False)
+    client_id = Column(BigInteger, nullable=False)
+    full_name = Column(String(255), nullable=False)
+    relationship = Column(String(50), nullable=False)
+    percentage = Column(Numeric(5, 2))
+    contact_info = Column(Text)
+
+    __table_args__ = (
+        Index("ix_beneficiary_archive_policy_id", "policy_id"),
+    )
+
+# --------------------
+# PolicyEvent (outbox: feed de cambios para consumidores, ver app/outbox.py y GET /events)
+# --------------------
+class PolicyEvent(Base):
+    __tablename__ = "policy_event"
+    seq = Column(BigInteger, primary_key=True)
+    # transacción que lo escribió: GET /events solo entrega eventos de transacciones ya terminadas
+    txid = Column(BigInteger, nullable=False, server_default=func.txid_current())
+    policy_id = Column(BigInteger, nullable=False)
+    entity = Column(String(20), nullable=False)  # policy | coverage | beneficiary
+    entity_id = Column(BigInteger, nullable=False)
+    op = Column(String(20), nullable=False)  # created | updated | cancelled | deleted | archived
+    data = Column(JSONB(none_as_null=True))  # estado tras el cambio (forma del schema *Read); null al borrar
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_policy_event_txid_seq", "txid", "seq"),  # orden de entrega del feed
+        Index("ix_policy_event_created_at", "created_at"),  # purga por antigüedad
+    )
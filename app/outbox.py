@@ -0,0 +1,99 @@
+# app/outbox.py
+"""Outbox de cambios (tabla policy_event) para los consumidores de GET /events.
+
+Cada mutación de pólizas, coberturas y beneficiarios llama a ``record`` en su misma transacción:
+el evento existe si y solo si el cambio se confirmó. El NOTIFY (entregado al hacer commit)
+despierta a los long-polls de todos los workers. Purga de eventos antiguos:
+
+    python -m app.outbox prune [--days 7]
+"""
+import argparse
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional
+
+import orjson
+from sqlalchemy import delete, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models, schemas
+from .db import NotifyListener
+from .serializers import dumps
+
+EVENTS_CHANNEL = "policy_events"  # canal LISTEN/NOTIFY compartido por todos los workers
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+
+# campos de cada entidad en data: los de su schema *Read (la póliza sin colecciones: van en sus propios eventos)
+ENTITY_FIELDS = {
+    "policy": [f for f in schemas.PolicyRead.model_fields if f not in ("coverages", "beneficiaries")],
+    "coverage": list(schemas.PolicyCoverageRead.model_fields),
+    "beneficiary": list(schemas.BeneficiaryRead.model_fields),
+}
+
+
+def _get(obj: Any, name: str):
+    return obj[name] if isinstance(obj, dict) or hasattr(obj, "keys") else getattr(obj, name)
+
+
+def event(entity: str, op: str, obj: Any = None, *, policy_id: Optional[int] = None, entity_id: Optional[int] = None) -> Dict[str, Any]:
+    """Fila de policy_event. obj: objeto ORM o fila con los campos de la entidad (None al borrar)."""
+    if obj is not None:
+        entity_id = _get(obj, "id")
+        policy_id = entity_id if entity == "policy" else _get(obj, "policy_id")
+        # mismo JSON que la API (Decimal como string, fechas ISO)
+        data = orjson.loads(dumps({f: _get(obj, f) for f in ENTITY_FIELDS[entity]}))
+    else:
+        data = None
+    return {"policy_id": policy_id, "entity": entity, "entity_id": entity_id, "op": op, "data": data}
+
+
+async def record(db: AsyncSession, events: Iterable[Dict[str, Any]]):
+    """Inserta los eventos (un INSERT multi-fila) y avisa a los long-polls al hacer commit."""
+    events = list(events)
+    if not events:
+        return
+    await db.execute(insert(models.PolicyEvent), events)
+    await db.execute(text("SELECT pg_notify(:channel, '')"), {"channel": EVENTS_CHANNEL})
+
+
+class EventNotifier:
+    """Despierta a los long-polls de este worker cuando llega un NOTIFY de EVENTS_CHANNEL."""
+
+    def __init__(self):
+        self._changed = asyncio.Event()
+
+    def changed(self) -> asyncio.Event:
+        # tomarlo ANTES de consultar: un aviso entre la consulta y la espera no se pierde
+        return self._changed
+
+    def notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+
+event_notifier = EventNotifier()
+event_listener = NotifyListener(EVENTS_CHANNEL, event_notifier.notify)
+
+
+async def prune(db: AsyncSession, days: int = OUTBOX_RETENTION_DAYS) -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    res = await db.execute(delete(models.PolicyEvent).where(models.PolicyEvent.created_at < cutoff))
+    return res.rowcount
+
+
+async def _main(args):
+    from .db import AsyncSessionLocal, engine
+
+    async with AsyncSessionLocal() as db:
+        deleted = await prune(db, args.days)
+        await db.commit()
+    await engine.dispose()
+    print(f"policy_event pruned: {deleted} rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mantenimiento del outbox policy_event")
+    parser.add_argument("command", choices=["prune"])
+    parser.add_argument("--days", type=int, default=OUTBOX_RETENTION_DAYS)
+    asyncio.run(_main(parser.parse_args()))
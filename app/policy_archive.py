@@ -0,0 +1,136 @@
+# app/policy_archive.py
+"""Archivado de pólizas fuera de la ventana de retención (job "policy.archive", ver app/jobs.py).
+
+Mueve a policy_archive / policy_coverage_archive / beneficiary_archive las pólizas canceladas
+hace más de ARCHIVE_CANCELLED_AFTER_DAYS días (por updated_at) y las vencidas hace más de
+ARCHIVE_EXPIRED_AFTER_DAYS días (por end_date), en lotes de JOB_CHUNK_SIZE: cada lote borra de las
+tablas vivas con DELETE ... RETURNING, inserta lo devuelto en el archivo y resta su contribución de
+policy_summary y anota un evento "archived" en el outbox (app/outbox.py), todo en una transacción.
+Las lecturas solo ven el archivo con include_archived=true.
+
+Ejecución fuera de la API (cron):
+
+    python -m app.policy_archive run [--cancelled-days 90] [--expired-days 365]
+"""
+import argparse
+import asyncio
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import delete, insert, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from . import jobs, models, outbox
+from .policy_summary import SUMMARY_FIELDS, SummaryDeltas, apply_deltas
+
+ARCHIVE = "policy.archive"
+ARCHIVE_CANCELLED_AFTER_DAYS = int(os.getenv("ARCHIVE_CANCELLED_AFTER_DAYS", "90"))
+ARCHIVE_EXPIRED_AFTER_DAYS = int(os.getenv("ARCHIVE_EXPIRED_AFTER_DAYS", "365"))
+
+# pares (tabla viva, archivo): hijas primero, las FK apuntan a policy
+_CHILD_ARCHIVES = (
+    (models.PolicyCoverage, models.PolicyCoverageArchive),
+    (models.Beneficiary, models.BeneficiaryArchive),
+)
+
+
+def archive_params(cancelled_days: Optional[int] = None, expired_days: Optional[int] = None) -> Dict[str, Any]:
+    """Fija los cortes al crear el job: relanzarlo o reanudarlo no mueve la ventana."""
+    cancelled_days = ARCHIVE_CANCELLED_AFTER_DAYS if cancelled_days is None else cancelled_days
+    expired_days = ARCHIVE_EXPIRED_AFTER_DAYS if expired_days is None else expired_days
+    return {
+        "cancelled_before": (datetime.now(timezone.utc) - timedelta(days=cancelled_days)).isoformat(),
+        "expired_before": (date.today() - timedelta(days=expired_days)).isoformat(),
+    }
+
+
+def _archivable(params: Dict[str, Any]):
+    P = models.Policy
+    return or_(
+        (P.status == "CANCELLED") & (P.updated_at < datetime.fromisoformat(params["cancelled_before"])),
+        P.end_date < date.fromisoformat(params["expired_before"]),
+    )
+
+
+def _partition_name(year: int) -> str:
+    return f"policy_archive_y{year}"
+
+
+async def ensure_partitions(db: AsyncSession, years):
+    """Crea (si falta) la partición anual de policy_archive para cada año (en la transacción del lote)."""
+    for year in sorted(years):
+        await db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {_partition_name(year)} PARTITION OF policy_archive "
+            f"FOR VALUES FROM ('{year}-01-01 00:00:00+00') TO ('{year + 1}-01-01 00:00:00+00')"
+        ))
+
+
+def _move(live, archive, condition, overrides=None):
+    # WITH moved AS (DELETE ... RETURNING *) INSERT INTO <archivo> SELECT ... FROM moved
+    names = [c.name for c in live.__table__.columns]
+    moved = delete(live).where(condition).returning(*[getattr(live, n) for n in names]).cte("moved")
+    overrides = {n: fn(moved.c[n]) for n, fn in (overrides or {}).items()}
+    return insert(archive).from_select(names, select(*[overrides.get(n, moved.c[n]) for n in names]))
+
+
+async def _count(db: AsyncSession, params: Dict[str, Any]) -> int:
+    res = await db.execute(select(func.count()).select_from(models.Policy).where(_archivable(params)))
+    return res.scalar_one()
+
+
+async def _step(db: AsyncSession, params: Dict[str, Any], cursor: int, chunk_size: int) -> Tuple[int, int]:
+    P = models.Policy
+    res = await db.execute(
+        select(P.id, P.created_at)
+        .where(_archivable(params), P.id > cursor)
+        .order_by(P.id)
+        .limit(chunk_size)
+        .with_for_update()
+    )
+    batch = res.all()
+    if not batch:
+        return 0, cursor
+    ids = [row.id for row in batch]
+    now = datetime.now(timezone.utc)
+    await ensure_partitions(db, {(row.created_at or now).year for row in batch})
+
+    for live, archive in _CHILD_ARCHIVES:
+        await db.execute(_move(live, archive, live.policy_id.in_(ids)))
+
+    A = models.PolicyArchive
+    # created_at es la clave de partición (NOT NULL en el archivo)
+    stmt = _move(P, A, P.id.in_(ids), {"created_at": lambda c: func.coalesce(c, func.now())})
+    res = await db.execute(stmt.returning(*[getattr(A, f) for f in SUMMARY_FIELDS]))
+    # policy_summary solo cuenta pólizas vivas
+    deltas = SummaryDeltas()
+    for row in res.mappings():
+        deltas.add(row, -1)
+    await apply_deltas(db, deltas)
+    # sale del conjunto vivo con sus hijas (siguen legibles con include_archived=true)
+    await outbox.record(db, [outbox.event("policy", "archived", policy_id=i, entity_id=i) for i in ids])
+    return len(ids), max(ids)
+
+
+jobs.register(ARCHIVE, _count, _step)
+
+
+async def _main(args):
+    from .db import AsyncSessionLocal, engine
+
+    async with AsyncSessionLocal() as db:
+        job = await jobs.job_runner.submit(db, ARCHIVE, archive_params(args.cancelled_days, args.expired_days))
+    await jobs.job_runner.join()
+    async with AsyncSessionLocal() as db:
+        job = (await db.execute(select(models.Job).where(models.Job.id == job.id))).scalar_one()
+    await engine.dispose()
+    print(f"job {job.id} {job.status}: {job.processed} policies archived" + (f" ({job.error})" if job.error else ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archivado de pólizas")
+    parser.add_argument("command", choices=["run"])
+    parser.add_argument("--cancelled-days", type=int, default=None)
+    parser.add_argument("--expired-days", type=int, default=None)
+    asyncio.run(_main(parser.parse_args()))
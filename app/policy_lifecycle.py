@@ -0,0 +1,113 @@
+# app/policy_lifecycle.py
+"""Jobs de ciclo de vida de pólizas (ver app/jobs.py): cambio de estado y renovación masivos.
+
+Cada lote es un único UPDATE ... FROM (SELECT ... ORDER BY id LIMIT n FOR UPDATE) RETURNING que
+sube la versión de cada póliza y devuelve valores viejos y nuevos para policy_summary y el
+outbox de eventos (app/outbox.py), en la misma transacción que el progreso del job.
+"""
+from datetime import date
+from typing import Any, Dict, Tuple
+
+from sqlalchemy import Date, cast, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from . import jobs, models, outbox
+from .policy_summary import SUMMARY_FIELDS, SummaryDeltas, apply_deltas
+
+BULK_UPDATE_STATUS = "policy.bulk_update_status"
+BULK_RENEW = "policy.bulk_renew"
+
+
+def _conditions(params: Dict[str, Any]):
+    P = models.Policy
+    f = params["filter"]
+    conditions = []
+    if f.get("customer_id") is not None:
+        conditions.append(P.customer_id == f["customer_id"])
+    if f.get("agent_id") is not None:
+        conditions.append(P.agent_id == f["agent_id"])
+    if f.get("product_id") is not None:
+        conditions.append(P.product_id == f["product_id"])
+    if f.get("status") is not None:
+        conditions.append(P.status == f["status"])
+    # params es JSONB: las fechas llegan como texto ISO
+    if f.get("end_date_from") is not None:
+        conditions.append(P.end_date >= date.fromisoformat(f["end_date_from"]))
+    if f.get("end_date_to") is not None:
+        conditions.append(P.end_date <= date.fromisoformat(f["end_date_to"]))
+    return conditions
+
+
+def _status_conditions(params: Dict[str, Any]):
+    # las que ya tienen el estado destino no se tocan (ni versión ni resumen)
+    return _conditions(params) + [models.Policy.status.is_distinct_from(params["status"])]
+
+
+async def _count(db: AsyncSession, conditions) -> int:
+    res = await db.execute(select(func.count()).select_from(models.Policy).where(*conditions))
+    return res.scalar_one()
+
+
+async def _update_chunk(db: AsyncSession, conditions, values: Dict[str, Any], cursor: int, chunk_size: int) -> Tuple[int, int]:
+    P = models.Policy
+    batch = (
+        select(P.id, *[getattr(P, f) for f in SUMMARY_FIELDS])
+        .where(*conditions, P.id > cursor)
+        .order_by(P.id)
+        .limit(chunk_size)
+        .with_for_update()
+        .cte("batch")
+    )
+    res = await db.execute(
+        update(P)
+        .where(P.id == batch.c.id)
+        .values(**values, version=P.version + 1, updated_at=func.now())
+        .returning(
+            *[batch.c[f].label(f"old_{f}") for f in SUMMARY_FIELDS],
+            *[getattr(P, f) for f in outbox.ENTITY_FIELDS["policy"]],
+        )
+    )
+    rows = res.mappings().all()
+    if not rows:
+        return 0, cursor
+    deltas = SummaryDeltas()
+    for row in rows:
+        deltas.move({f: row[f"old_{f}"] for f in SUMMARY_FIELDS}, row)
+    await apply_deltas(db, deltas)
+    await outbox.record(db, [outbox.event("policy", "updated", row) for row in rows])
+    return len(rows), max(row["id"] for row in rows)
+
+
+# --------------------
+# bulkUpdateStatus
+# --------------------
+async def _count_status(db: AsyncSession, params: Dict[str, Any]) -> int:
+    return await _count(db, _status_conditions(params))
+
+
+async def _step_status(db: AsyncSession, params: Dict[str, Any], cursor: int, chunk_size: int) -> Tuple[int, int]:
+    return await _update_chunk(db, _status_conditions(params), {"status": params["status"]}, cursor, chunk_size)
+
+
+# --------------------
+# bulkRenew
+# --------------------
+def _shift(column, months: int):
+    # fecha + N meses (fin de mes se ajusta: 31-ene + 1 mes = 28/29-feb); NULL sigue NULL
+    return cast(column + func.make_interval(0, months), Date)
+
+
+async def _count_renew(db: AsyncSession, params: Dict[str, Any]) -> int:
+    return await _count(db, _conditions(params))
+
+
+async def _step_renew(db: AsyncSession, params: Dict[str, Any], cursor: int, chunk_size: int) -> Tuple[int, int]:
+    P = models.Policy
+    months = params["months"]
+    values = {"start_date": _shift(P.start_date, months), "end_date": _shift(P.end_date, months)}
+    return await _update_chunk(db, _conditions(params), values, cursor, chunk_size)
+
+
+jobs.register(BULK_UPDATE_STATUS, _count_status, _step_status)
+jobs.register(BULK_RENEW, _count_renew, _step_renew)
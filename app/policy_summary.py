@@ -0,0 +1,142 @@
+# app/policy_summary.py
+"""Mantenimiento incremental de policy_summary (ver models.PolicySummary).
+
+Cada escritura de pólizas acumula deltas (+1/-1 y los importes) por clave y los aplica con un
+único INSERT ... ON CONFLICT DO UPDATE en la misma transacción. Reconstrucción completa:
+
+    python -m app.policy_summary rebuild
+"""
+import argparse
+import asyncio
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Mapping, Tuple
+
+from sqlalchemy import Date, cast, delete, func, insert, literal_column, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+
+# columnas de policy que determinan la fila de resumen o sus importes
+SUMMARY_DIMENSIONS = ("product_id", "status", "agent_id", "start_date", "end_date")
+SUMMARY_FIELDS = SUMMARY_DIMENSIONS + ("premium", "sum_insured")
+# columnas de policy_summary para cada dimensión (las fechas se guardan truncadas al mes)
+SUMMARY_KEY = ("product_id", "status", "agent_id", "start_month", "end_month")
+_MONTH_DIMENSIONS = ("start_date", "end_date")
+_KEY_INDEX = next(i for i in models.PolicySummary.__table__.indexes if i.name == "ux_policy_summary_key")
+
+
+def _get(policy: Any, name: str):
+    return policy[name] if isinstance(policy, Mapping) else getattr(policy, name)
+
+
+def _dimension(policy: Any, name: str):
+    # "" y NULL comparten fila (el índice único usa coalesce(..., '')): se guarda siempre NULL
+    value = _get(policy, name)
+    if name in _MONTH_DIMENSIONS:
+        return value.replace(day=1) if value is not None else None
+    return None if value == "" else value
+
+
+class SummaryDeltas:
+    """Acumula los cambios de un lote de escrituras agrupados por clave de resumen."""
+
+    def __init__(self):
+        self._deltas: Dict[Tuple, list] = defaultdict(lambda: [0, Decimal(0), Decimal(0)])
+
+    def add(self, policy: Any, sign: int = 1):
+        """policy: objeto ORM, fila o dict con SUMMARY_FIELDS; sign=-1 para restar su contribución."""
+        delta = self._deltas[tuple(_dimension(policy, d) for d in SUMMARY_DIMENSIONS)]
+        delta[0] += sign
+        delta[1] += sign * (_get(policy, "premium") or 0)
+        delta[2] += sign * (_get(policy, "sum_insured") or 0)
+
+    def move(self, old: Any, new: Any):
+        self.add(old, -1)
+        self.add(new, 1)
+
+    def rows(self):
+        # orden fijo de claves: dos transacciones concurrentes bloquean las filas en el mismo orden
+        items = sorted(self._deltas.items(), key=lambda kv: tuple((v is None, str(v)) for v in kv[0]))
+        for key, (count, premium, sum_insured) in items:
+            if count or premium or sum_insured:
+                yield {
+                    **dict(zip(SUMMARY_KEY, key)),
+                    "policy_count": count,
+                    "premium_total": premium,
+                    "sum_insured_total": sum_insured,
+                }
+
+
+async def apply_deltas(db: AsyncSession, deltas: SummaryDeltas):
+    rows = list(deltas.rows())
+    if not rows:
+        return
+    stmt = pg_insert(models.PolicySummary)
+    stmt = stmt.on_conflict_do_update(
+        constraint=_KEY_INDEX,
+        set_={
+            "policy_count": models.PolicySummary.policy_count + stmt.excluded.policy_count,
+            "premium_total": models.PolicySummary.premium_total + stmt.excluded.premium_total,
+            "sum_insured_total": models.PolicySummary.sum_insured_total + stmt.excluded.sum_insured_total,
+        },
+    )
+    await db.execute(stmt, rows)
+
+
+async def snapshot(db: AsyncSession, policy_id: int):
+    """Valores actuales de SUMMARY_FIELDS con la fila bloqueada (FOR UPDATE) hasta el commit; None si no existe."""
+    P = models.Policy
+    res = await db.execute(
+        select(*[getattr(P, f) for f in SUMMARY_FIELDS]).where(P.id == policy_id).with_for_update()
+    )
+    row = res.one_or_none()
+    return row._mapping if row is not None else None
+
+
+async def record_created(db: AsyncSession, policies: Iterable[Any]):
+    deltas = SummaryDeltas()
+    for p in policies:
+        deltas.add(p)
+    await apply_deltas(db, deltas)
+
+
+async def rebuild(db: AsyncSession):
+    """Recalcula policy_summary desde policy; bloquea escrituras de pólizas hasta el commit."""
+    await db.execute(text("LOCK TABLE policy IN SHARE MODE"))
+    await db.execute(delete(models.PolicySummary))
+    P = models.Policy
+    empty = literal_column("''")
+    dims = [
+        P.product_id, func.nullif(P.status, empty), func.nullif(P.agent_id, empty),
+        cast(func.date_trunc("month", P.start_date), Date), cast(func.date_trunc("month", P.end_date), Date),
+    ]
+    agg = select(
+        *dims,
+        func.count(),
+        func.coalesce(func.sum(P.premium), 0),
+        func.coalesce(func.sum(P.sum_insured), 0),
+    ).group_by(*dims)
+    await db.execute(
+        insert(models.PolicySummary).from_select(
+            list(SUMMARY_KEY) + ["policy_count", "premium_total", "sum_insured_total"], agg
+        )
+    )
+
+
+async def _main(args):
+    from .db import AsyncSessionLocal, engine
+
+    async with AsyncSessionLocal() as db:
+        await rebuild(db)
+        await db.commit()
+        rows = (await db.execute(select(func.count()).select_from(models.PolicySummary))).scalar()
+    await engine.dispose()
+    print(f"policy_summary rebuilt: {rows} rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mantenimiento de policy_summary")
+    parser.add_argument("command", choices=["rebuild"])
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,120 @@
+# app/product_cache.py
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from . import models, schemas
+from .db import NotifyListener
+
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", "300"))  # segundos
+PRODUCT_CACHE_MAX_SIZE = int(os.getenv("PRODUCT_CACHE_MAX_SIZE", "1024"))  # entradas
+PRODUCT_CACHE_CHANNEL = "product_cache"  # canal LISTEN/NOTIFY compartido por todos los workers
+
+_ALL = ("all",)
+
+
+class ProductCache:
+    """Caché por worker del catálogo de productos (por id, por code y la lista completa).
+
+    Entradas con TTL y expulsión LRU al superar max_size. Guarda ProductRead (no objetos ORM,
+    que están ligados a una sesión).
+    """
+
+    def __init__(self, ttl: float = PRODUCT_CACHE_TTL, max_size: int = PRODUCT_CACHE_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._generation = 0  # se incrementa al invalidar: una carga en vuelo no repuebla datos viejos
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _get(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def _put(self, key: Hashable, value: Any, generation: int):
+        if generation != self._generation:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _put_product(self, product: schemas.ProductRead, generation: int):
+        self._put(("id", product.id), product, generation)
+        self._put(("code", product.code), product, generation)
+
+    async def get_by_id(self, db: AsyncSession, product_id: int) -> Optional[schemas.ProductRead]:
+        cached = self._get(("id", product_id))
+        if cached is not None:
+            return cached
+        return await self._load_one(db, models.Product.id == product_id)
+
+    async def get_by_code(self, db: AsyncSession, code: str) -> Optional[schemas.ProductRead]:
+        cached = self._get(("code", code))
+        if cached is not None:
+            return cached
+        return await self._load_one(db, models.Product.code == code)
+
+    async def get_all(self, db: AsyncSession) -> List[schemas.ProductRead]:
+        cached = self._get(_ALL)
+        if cached is not None:
+            return cached
+        generation = self._generation
+        res = await db.execute(select(models.Product))
+        products = [schemas.ProductRead.model_validate(p) for p in res.scalars().all()]
+        self._put(_ALL, products, generation)
+        return products
+
+    async def _load_one(self, db: AsyncSession, condition) -> Optional[schemas.ProductRead]:
+        generation = self._generation
+        res = await db.execute(select(models.Product).where(condition))
+        product = res.scalar_one_or_none()
+        if product is None:
+            return None  # no se cachean ausencias
+        product_read = schemas.ProductRead.model_validate(product)
+        self._put_product(product_read, generation)
+        return product_read
+
+    def invalidate(self):
+        self._generation += 1
+        self._entries.clear()
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+product_cache = ProductCache()
+
+
+async def notify_product_change(db: AsyncSession):
+    """Invalida la caché en todos los workers; se entrega al hacer commit de la transacción actual."""
+    await db.execute(text("SELECT pg_notify(:channel, '')"), {"channel": PRODUCT_CACHE_CHANNEL})
+
+
+# vacía la caché local en cada notificación (y tras reconectar, por si se perdió alguna)
+product_cache_listener = NotifyListener(PRODUCT_CACHE_CHANNEL, product_cache.invalidate)
@@ -0,0 +1,58 @@
+# app/response_cache.py
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# tamaño máximo (bytes) de cuerpos cacheados por worker; 0 desactiva la caché
+POLICY_RESPONSE_CACHE_MAX_BYTES = int(os.getenv("POLICY_RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+
+class ResponseCache:
+    """LRU por worker de cuerpos JSON ya serializados, acotada por bytes.
+
+    Las claves incluyen la versión del recurso, así que una entrada nunca queda obsoleta:
+    al cambiar la versión deja de pedirse y acaba expulsada. No hace falta invalidar entre workers.
+    """
+
+    def __init__(self, max_bytes: int = POLICY_RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key: Hashable, body: bytes):
+        if len(body) > self.max_bytes:
+            return  # también cubre max_bytes=0 (desactivada)
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._entries[key] = body
+        self._bytes += len(body)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+policy_response_cache = ResponseCache()
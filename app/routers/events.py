@@ -0,0 +1,71 @@
+# app/routers/events.py
+import asyncio
+import os
+
+from fastapi import APIRouter, HTTPException, Query
+from sqlalchemy import tuple_
+from sqlalchemy.future import select
+from sqlalchemy.sql import func
+
+from .. import models, schemas
+from ..db import AsyncSessionLocal
+from ..outbox import event_notifier
+from ..serializers import JSONBytesResponse, event_serializer
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+EVENTS_BATCH_MAX = int(os.getenv("EVENTS_BATCH_MAX", "1000"))
+EVENTS_MAX_WAIT = float(os.getenv("EVENTS_MAX_WAIT", "30"))
+# re-consulta durante el long-poll aunque no llegue NOTIFY: el horizonte (xmin) avanza también
+# cuando termina una transacción ajena sin eventos
+EVENTS_POLL_INTERVAL = float(os.getenv("EVENTS_POLL_INTERVAL", "1.0"))
+
+
+async def _fetch(after: int, limit: int):
+    # sesión corta por intento: el long-poll no retiene conexiones del pool mientras espera
+    E = models.PolicyEvent
+    async with AsyncSessionLocal() as db:
+        stmt = select(E)
+        if after:
+            res = await db.execute(select(E.txid).where(E.seq == after))
+            txid = res.scalar_one_or_none()
+            if txid is None:
+                raise HTTPException(status_code=410, detail="Cursor expired: restart from after=0")
+            stmt = stmt.where(tuple_(E.txid, E.seq) > tuple_(txid, after))
+        # seq se asigna al insertar, no al confirmar: se ordena por transacción y solo se entregan
+        # las de transacciones anteriores al xmin del snapshot (todas terminadas), así una
+        # transacción lenta no deja huecos detrás del cursor
+        res = await db.execute(
+            stmt.where(E.txid < func.txid_snapshot_xmin(func.txid_current_snapshot()))
+            .order_by(E.txid, E.seq)
+            .limit(limit)
+        )
+        return res.scalars().all()
+
+
+# --------------------
+# GET /events?after=<seq>
+# --------------------
+@router.get("", response_model=schemas.PolicyEventPage)
+async def list_events(
+    after: int = Query(0, ge=0, description="Último seq recibido (next_after de la respuesta anterior); 0 = desde el principio"),
+    limit: int = Query(EVENTS_BATCH_MAX, ge=1, le=EVENTS_BATCH_MAX),
+    wait: float = Query(0, ge=0, le=EVENTS_MAX_WAIT, description="Long-poll: segundos a esperar si no hay eventos"),
+):
+    """Cambios de pólizas, coberturas y beneficiarios en orden de transacción (txid, seq), solo de transacciones ya terminadas; entrega al-menos-una-vez."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while True:
+        changed = event_notifier.changed()
+        events = await _fetch(after, limit)
+        remaining = deadline - loop.time()
+        if events or remaining <= 0:
+            break
+        try:
+            await asyncio.wait_for(changed.wait(), timeout=min(remaining, EVENTS_POLL_INTERVAL))
+        except asyncio.TimeoutError:
+            pass
+    return JSONBytesResponse({
+        "events": event_serializer.to_list(events),
+        "next_after": events[-1].seq if events else after,
+    })
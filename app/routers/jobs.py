@@ -0,0 +1,40 @@
+# app/routers/jobs.py
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from .. import models, schemas
+from ..db import get_session, remember_write
+from ..jobs import job_runner
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+# --------------------
+# GET /jobs/{job_id}
+# --------------------
+@router.get("/{job_id}", response_model=schemas.JobRead)
+async def get_job(job_id: int, db: AsyncSession = Depends(get_session)):
+    # primario: el progreso cambia en cada lote y una réplica lo mostraría atrasado
+    await job_runner.reap(db, job_id)  # worker muerto: el job pasa a failed en vez de quedarse running
+    res = await db.execute(select(models.Job).where(models.Job.id == job_id))
+    job = res.scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+# --------------------
+# POST /jobs/{job_id}:cancel
+# --------------------
+@router.post("/{job_id}:cancel", response_model=schemas.JobRead, dependencies=[Depends(remember_write)])
+async def cancel_job(job_id: int, db: AsyncSession = Depends(get_session)):
+    """Los lotes ya confirmados se quedan aplicados; el job termina en cancelled antes del siguiente."""
+    await job_runner.reap(db, job_id)  # sin runner vivo nadie aplicaría la cancelación: 409 (failed)
+    job = await job_runner.cancel(db, job_id)
+    if job:
+        return job
+    job = await get_job(job_id, db)
+    if job.status != "cancelled":
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    return job
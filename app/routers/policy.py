@@ -1,11 +1,34 @@
 # app/routers/policy.py
-from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import base64
+import csv
+import hashlib
+import io
+import json
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import List, Optional, Dict, Any, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import case, delete, insert, literal, literal_column, or_, tuple_, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql import func
 
-from .. import models, schemas
-from ..db import get_session
+from .. import models, outbox, policy_archive, policy_lifecycle, schemas
+from ..db import get_read_session, get_session, read_sessionmaker, read_target, remember_write
+from ..jobs import job_runner
+from ..policy_summary import SUMMARY_FIELDS, SummaryDeltas, apply_deltas, record_created, snapshot
+from ..product_cache import product_cache
+from ..response_cache import policy_response_cache
+from ..serializers import JSONBytesResponse, beneficiary_serializer, coverage_serializer, dumps, policy_serializer
+from ..singleflight import SingleFlight
 
 router = APIRouter(prefix="/policies", tags=["policies"])
 
@@ -31,98 +54,1005 @@ async def _load_beneficiaries_for_policy(db: AsyncSession, policy_id: int) -> Li
     return res.scalars().all()
 
 
+# --------------------
+# VERSIONES / ETAG (GET condicionales)
+# --------------------
+def _version_bump() -> Dict[str, Any]:
+    # valores a añadir a todo UPDATE de policy
+    return {"version": models.Policy.version + 1, "updated_at": func.now()}
+
+
+async def _touch_policy(db: AsyncSession, policy_id: int):
+    # cambio en una colección hija: sube la versión de la póliza en la misma transacción
+    # (bloquea la fila padre, así que las escrituras concurrentes sobre la misma póliza se serializan)
+    res = await db.execute(
+        update(models.Policy).where(models.Policy.id == policy_id).values(**_version_bump()).returning(models.Policy.id)
+    )
+    if res.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Policy not found")
+
+
+async def _policy_version_or_404(db: AsyncSession, policy_id: int) -> int:
+    res = await db.execute(select(models.Policy.version).where(models.Policy.id == policy_id))
+    version = res.scalar_one_or_none()
+    if version is None:
+        raise HTTPException(status_code=404, detail="Policy not found")
+    return version
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [t.strip() for t in if_none_match.split(",")]
+    # comparación débil (RFC 9110): W/"x" equivale a "x"
+    return "*" in candidates or etag in (t[2:] if t.startswith("W/") else t for t in candidates)
+
+
+# lecturas idénticas concurrentes del mismo worker comparten una sola consulta (ver app/singleflight.py)
+policy_reads = SingleFlight("policy")
+
+
+async def _versioned_response(request: Request, policy_id: int, variant: str, build) -> Response:
+    """Lectura de una póliza (o de una colección suya) con ETag y caché de cuerpos por (id, versión, variante).
+
+    Un If-None-Match vigente o un acierto de caché cuestan un solo SELECT de la versión por PK, también
+    en un worker con la caché fría: el 304 se decide antes de tocar ``build``. ``build(db)`` (carga ORM +
+    serialización) solo se ejecuta en un fallo, y las peticiones concurrentes con la misma clave
+    comparten esa carga.
+    """
+    maker = read_sessionmaker(request)
+    async with maker() as db:
+        version = await _policy_version_or_404(db, policy_id)
+    etag = _etag(policy_id, version, variant)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    key = (policy_id, version, variant)
+    body = policy_response_cache.get(key)
+    if body is None:
+        async def fetch():
+            # build lee después que la versión (y del mismo destino): el cuerpo nunca es más viejo que la clave
+            async with maker() as db:
+                body = dumps(await build(db))
+            policy_response_cache.put(key, body)
+            return body
+
+        body = await policy_reads.do((key, read_target(maker)), fetch)
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+
+def _etag(policy_id: int, version: int, variant: str) -> str:
+    return f'"{policy_id}-{version}-{variant}"'
+
+
+def _etag_response(request: Request, policy_id: int, version: int, variant: str, body: bytes) -> Response:
+    etag = _etag(policy_id, version, variant)
+    headers = {"ETag": etag}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+# --------------------
+# ESCRITURAS EN UNA SOLA SENTENCIA (... RETURNING)
+# --------------------
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+async def _insert_returning(db: AsyncSession, model, values: Dict[str, Any], parent_not_found: str):
+    # INSERT ... RETURNING: la FK hace de chequeo de existencia del padre (sin SELECT previo)
+    try:
+        res = await db.execute(insert(model).values(**values).returning(model))
+    except IntegrityError as exc:
+        await db.rollback()
+        if getattr(exc.orig, "sqlstate", None) == FOREIGN_KEY_VIOLATION:
+            raise HTTPException(status_code=404, detail=parent_not_found)
+        raise
+    return res.scalar_one()
+
+
+async def _update_returning(db: AsyncSession, model, conditions, values: Dict[str, Any], not_found: str):
+    # UPDATE ... WHERE <conditions> RETURNING *: 0 filas => 404
+    if values:
+        stmt = update(model).where(*conditions).values(**values).returning(model)
+    else:
+        stmt = select(model).where(*conditions)
+    res = await db.execute(stmt.execution_options(populate_existing=True))
+    obj = res.scalar_one_or_none()
+    if obj is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    return obj
+
+
+async def _delete_returning(db: AsyncSession, model, conditions, not_found: str):
+    res = await db.execute(delete(model).where(*conditions).returning(model.id))
+    if res.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail=not_found)
+
+
+# colecciones hijas que se pueden pedir con ?include=
+POLICY_INCLUDES = {
+    "coverages": models.Policy.coverages,
+    "beneficiaries": models.Policy.beneficiaries,
+}
+DEFAULT_INCLUDE = "coverages"
+
+
+def _parse_include(include: Optional[str]) -> List[str]:
+    if not include:
+        return []
+    names = [n.strip() for n in include.split(",") if n.strip()]
+    unknown = [n for n in names if n not in POLICY_INCLUDES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown include: {', '.join(unknown)}")
+    return names
+
+
+def _policy_load_options(include: List[str]):
+    # selectinload: un único SELECT ... WHERE policy_id IN (...) por colección y por página
+    return [selectinload(POLICY_INCLUDES[name]) for name in include]
+
+
+def _fill_excluded(policies: List[models.Policy], include: List[str]) -> List[models.Policy]:
+    # las colecciones no pedidas se exponen vacías (lazy="raise" fallaría al serializar)
+    for name in POLICY_INCLUDES:
+        if name not in include:
+            for p in policies:
+                set_committed_value(p, name, [])
+    return policies
+
+
+async def _load_policy(db: AsyncSession, policy_id: int, include: List[str]) -> models.Policy:
+    stmt = (
+        select(models.Policy)
+        .options(*_policy_load_options(include))
+        .where(models.Policy.id == policy_id)
+        .execution_options(populate_existing=True)  # refresca la instancia del identity map tras commit
+    )
+    res = await db.execute(stmt)
+    policy = res.scalar_one_or_none()
+    if not policy:
+        raise HTTPException(status_code=404, detail="Policy not found")
+    _fill_excluded([policy], include)
+    return policy
+
+
+# --------------------
+# SPARSE FIELDSETS (?fields=policy_number,status,coverages.coverage_code)
+# --------------------
+POLICY_FIELDS = [f for f in schemas.PolicyRead.model_fields if f not in POLICY_INCLUDES]
+POLICY_CHILD_FIELDS = {
+    "coverages": (models.PolicyCoverage, list(schemas.PolicyCoverageRead.model_fields)),
+    "beneficiaries": (models.Beneficiary, list(schemas.BeneficiaryRead.model_fields)),
+}
+POLICY_CHILD_ARCHIVES = {"coverages": models.PolicyCoverageArchive, "beneficiaries": models.BeneficiaryArchive}
+FIELDS_DESCRIPTION = "Campos separados por coma (p. ej. policy_number,status,coverages.coverage_code); sustituye a include"
+
+# (campos de policy, {colección: campos}) en el orden del schema
+FieldSet = Tuple[List[str], Dict[str, List[str]]]
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[FieldSet]:
+    if fields is None:
+        return None
+    top, nested, unknown = set(), {}, []
+    for name in (n.strip() for n in fields.split(",")):
+        if not name:
+            continue
+        head, _, sub = name.partition(".")
+        if head in POLICY_CHILD_FIELDS:
+            allowed = POLICY_CHILD_FIELDS[head][1]
+            chosen = nested.setdefault(head, set())
+            if not sub:
+                chosen.update(allowed)  # "coverages" sin subcampo = todos sus campos
+            elif sub in allowed:
+                chosen.add(sub)
+            else:
+                unknown.append(name)
+        elif head in POLICY_FIELDS and not sub:
+            top.add(head)
+        else:
+            unknown.append(name)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    if not top and not nested:
+        raise HTTPException(status_code=400, detail="fields must not be empty")
+    return (
+        [f for f in POLICY_FIELDS if f in top],
+        {c: [f for f in POLICY_CHILD_FIELDS[c][1] if f in chosen] for c, chosen in nested.items()},
+    )
+
+
+def _include_fieldset(include: List[str]) -> FieldSet:
+    # equivalente proyectado de ?include= (misma forma que PolicyRead: colecciones no pedidas vacías)
+    return list(POLICY_FIELDS), {c: (POLICY_CHILD_FIELDS[c][1] if c in include else []) for c in POLICY_INCLUDES}
+
+
+def _fields_variant(fieldset: FieldSet) -> str:
+    # forma canónica: el mismo conjunto en otro orden comparte ETag y entrada de caché.
+    # Va al ETag como digest: una lista con comas rompería la partición de If-None-Match por ","
+    policy_fields, children = fieldset
+    parts = list(policy_fields)
+    for c in sorted(children):
+        if children[c] == POLICY_CHILD_FIELDS[c][1]:
+            parts.append(c)
+        else:
+            parts.extend(f"{c}.{f}" for f in children[c])
+    return hashlib.sha1(",".join(parts).encode()).hexdigest()[:16]
+
+
+def _projected_select(fieldset: FieldSet, model=models.Policy):
+    # solo las columnas pedidas, más id (colecciones hijas) y created_at (cursor);
+    # model=models.PolicyArchive para leer del archivo (mismas columnas)
+    names = ["id", "created_at"] + [f for f in fieldset[0] if f not in ("id", "created_at")]
+    return select(*[getattr(model, f) for f in names])
+
+
+async def _project_policies(db: AsyncSession, rows, fieldset: FieldSet, archived: Optional[bool] = False) -> List[Dict[str, Any]]:
+    """Filas de _projected_select -> dicts recortados; un SELECT proyectado por colección pedida.
+
+    archived: False = hijas de las tablas vivas, True = del archivo, None = de ambas (UNION ALL).
+    """
+    policy_fields, children = fieldset
+    result = [{f: row._mapping[f] for f in policy_fields} for row in rows]
+    if not rows:
+        return result
+    ids = [row.id for row in rows]
+    for name, child_fields in children.items():
+        if not child_fields:
+            for data in result:
+                data[name] = []
+            continue
+        sources = {False: [POLICY_CHILD_FIELDS[name][0]], True: [POLICY_CHILD_ARCHIVES[name]]}.get(
+            archived, [POLICY_CHILD_FIELDS[name][0], POLICY_CHILD_ARCHIVES[name]]
+        )
+        selects = [
+            select(m.policy_id, m.id, *[getattr(m, f) for f in child_fields if f not in ("policy_id", "id")])
+            .where(m.policy_id.in_(ids))
+            for m in sources
+        ]
+        stmt = selects[0] if len(selects) == 1 else union_all(*selects)
+        res = await db.execute(stmt.order_by(literal_column("policy_id"), literal_column("id")))
+        grouped: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for child in res.mappings():
+            grouped[child["policy_id"]].append({f: child[f] for f in child_fields})
+        for data, policy_id in zip(result, ids):
+            data[name] = grouped.get(policy_id, [])
+    return result
+
+
+# máximo de claves por petición en :batchGet y en customerId multivalor
+BATCH_GET_MAX_ITEMS = 1000
+
+
+def _check_batch_size(name: str, count: int):
+    if count > BATCH_GET_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Too many {name}: max {BATCH_GET_MAX_ITEMS}")
+
+
+def _apply_policy_filters(stmt, customer_ids: Optional[List[int]], agent_id: Optional[str], status: Optional[str], model=models.Policy):
+    if customer_ids:
+        if len(customer_ids) == 1:
+            stmt = stmt.where(model.customer_id == customer_ids[0])
+        else:
+            stmt = stmt.where(model.customer_id.in_(customer_ids))
+    if agent_id is not None:
+        stmt = stmt.where(model.agent_id == agent_id)
+    if status is not None:
+        stmt = stmt.where(model.status == status)
+    return stmt
+
+
+# --------------------
+# CURSOR (keyset) — opaco para el cliente: base64url de [created_at, id]
+# --------------------
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode_cursor(policy: models.Policy) -> str:
+    raw = json.dumps([policy.created_at.isoformat(), policy.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, policy_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(policy_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 # ============================================================
 # POLICIES
 # ============================================================
 @router.get("/", response_model=List[schemas.PolicyRead])
 async def list_policies(
-    customerId: Optional[int] = Query(None),
+    customerId: Optional[List[int]] = Query(None, description="Repetible: ?customerId=1&customerId=2"),
     agentId: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     limit: int = Query(100, ge=1, le=1000),
-    offset: int = Query(0, ge=0),
-    db: AsyncSession = Depends(get_session),
+    offset: int = Query(0, ge=0, description="Obsoleto: usar cursor (coste lineal con la profundidad)"),
+    cursor: Optional[str] = Query(None, description=f"Valor de {NEXT_CURSOR_HEADER} de la página anterior"),
+    include: Optional[str] = Query(DEFAULT_INCLUDE, description="Colecciones hijas separadas por coma: coverages,beneficiaries"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include_archived: bool = Query(False, description="Incluir pólizas archivadas (policy_archive)"),
+    db: AsyncSession = Depends(get_read_session),
 ):
-    stmt = select(models.Policy)
-    if customerId is not None:
-        stmt = stmt.where(models.Policy.customer_id == customerId)
-    if agentId is not None:
-        stmt = stmt.where(models.Policy.agent_id == agentId)
-    if status is not None:
-        stmt = stmt.where(models.Policy.status == status)
+    fieldset = _parse_fields(fields)
+    include_names = _parse_include(include) if fieldset is None else []
+    _check_batch_size("customerId values", len(customerId or []))
+    if include_archived and fieldset is None:
+        # el archivo no tiene entidades ORM con relaciones: se lee siempre proyectado
+        fieldset = _include_fieldset(include_names)
+    last = _decode_cursor(cursor) if cursor else None
+
+    def page(stmt, model, skip: int, size: int):
+        stmt = _apply_policy_filters(stmt, customerId, agentId, status, model)
+        # orden estable (created_at, id): lo sirven los índices compuestos de models.Policy / PolicyArchive
+        if last:
+            stmt = stmt.where(tuple_(model.created_at, model.id) > tuple_(*last))
+        else:
+            stmt = stmt.offset(skip)
+        return stmt.order_by(model.created_at, model.id).limit(size)
+
+    if fieldset is None:
+        stmt = page(select(models.Policy).options(*_policy_load_options(include_names)), models.Policy, offset, limit)
+    elif not include_archived:
+        stmt = page(_projected_select(fieldset), models.Policy, offset, limit)
+    else:
+        # cada rama lee su página por índice; el UNION ALL ordenado se queda con las primeras
+        merged = union_all(
+            page(_projected_select(fieldset), models.Policy, 0, offset + limit),
+            page(_projected_select(fieldset, models.PolicyArchive), models.PolicyArchive, 0, offset + limit),
+        ).subquery()
+        stmt = select(merged).order_by(merged.c.created_at, merged.c.id).limit(limit)
+        if not last:
+            stmt = stmt.offset(offset)
 
-    stmt = stmt.limit(limit).offset(offset)
     res = await db.execute(stmt)
-    policies = res.scalars().all()
-
-    # cargar coverages por cada policy (simple N+1; acceptable para listado limitado)
-    result: List[schemas.PolicyRead] = []
-    for p in policies:
-        coverages = await _load_coverages_for_policy(db, p.id)
-        p.coverages = coverages  # Pydantic will read attributes because from_attributes=True
-        result.append(p)
-    return result
+    if fieldset is None:
+        policies = _fill_excluded(res.scalars().all(), include_names)
+        # lectura: dicts precalculados + orjson en lugar de revalidar cada fila con PolicyRead
+        body = policy_serializer.to_list(policies)
+    else:
+        policies = res.all()  # filas con id y created_at: sirven igual para el cursor
+        body = await _project_policies(db, policies, fieldset, None if include_archived else False)
+    headers = {NEXT_CURSOR_HEADER: _encode_cursor(policies[-1])} if len(policies) == limit else None
+    return JSONBytesResponse(body, headers=headers)
+
+
+# --------------------
+# EXPORT (streaming NDJSON / CSV)
+# --------------------
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_CSV_COLUMNS = [f for f in schemas.PolicyRead.model_fields if f not in ("coverages", "beneficiaries")]
+
+
+def _export_row(policy: models.Policy) -> Dict[str, Any]:
+    # mismo serializer que el listado; el export no lleva beneficiarios
+    row = policy_serializer.to_dict(policy)
+    del row["beneficiaries"]
+    return row
+
+
+def _csv_cell(value: Any) -> Any:
+    # fechas con el mismo texto que en JSON (ISO, UTC con "Z"); Decimal y el resto vía str() del writer
+    if isinstance(value, (date, datetime)):
+        return dumps(value)[1:-1].decode()
+    return value
+
+
+def _export_chunk(rows: List[Dict[str, Any]], fmt: str) -> bytes:
+    if fmt == "ndjson":
+        return b"".join(dumps(r) + b"\n" for r in rows)
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for r in rows:
+        writer.writerow([_csv_cell(r[c]) for c in EXPORT_CSV_COLUMNS] + [dumps(r["coverages"]).decode()])
+    return buf.getvalue().encode()
+
+
+async def _stream_policies(session_factory, fmt: str, customer_ids: Optional[List[int]], agent_id: Optional[str], status: Optional[str]):
+    # sesión propia: la de Depends(get_session) se cierra antes de que empiece el streaming
+    async with session_factory() as session:
+        if fmt == "csv":
+            yield (",".join(EXPORT_CSV_COLUMNS + ["coverages"]) + "\r\n").encode()
+
+        stmt = _apply_policy_filters(select(models.Policy), customer_ids, agent_id, status)
+        stmt = stmt.order_by(models.Policy.created_at, models.Policy.id).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        result = await session.stream(stmt)  # cursor de servidor: nunca se materializa la tabla completa
+        async for partition in result.scalars().partitions():
+            ids = [p.id for p in partition]
+            cov_res = await session.execute(select(models.PolicyCoverage).where(models.PolicyCoverage.policy_id.in_(ids)))
+            by_policy: Dict[int, List[models.PolicyCoverage]] = defaultdict(list)
+            for cov in cov_res.scalars():
+                by_policy[cov.policy_id].append(cov)
+            for p in partition:
+                set_committed_value(p, "coverages", by_policy[p.id])
+            _fill_excluded(partition, ["coverages"])
+            yield _export_chunk([_export_row(p) for p in partition], fmt)
+            session.expunge_all()  # el identity map no crece con el tamaño del export
+
+
+@router.get("/export")
+async def export_policies(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    customerId: Optional[List[int]] = Query(None),
+    agentId: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+):
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    return StreamingResponse(
+        _stream_policies(read_sessionmaker(request), format, customerId, agentId, status),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="policies.{format}"'},
+    )
+
+
+# --------------------
+# SEARCH (pg_trgm: prefijo y similitud sobre policy_number y Beneficiary.full_name)
+# --------------------
+SEARCH_MIN_LENGTH = 3  # con menos de 3 caracteres no hay trigramas que usar en el índice
+# peso del prefijo por campo: un prefijo de policy_number gana a cualquier coincidencia aproximada
+SEARCH_PREFIX_SCORE = {"policy_number": 1.0, "full_name": 0.9}
+
+
+def _like_prefix(q: str) -> str:
+    return q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def _search_hits(q: Optional[str], coverage_code: Optional[str]):
+    """Subconsulta (policy_id, score) con una fila por póliza."""
+    P, B, C = models.Policy, models.Beneficiary, models.PolicyCoverage
+    if q:
+        prefix = _like_prefix(q)
+        by_number = select(
+            P.id.label("policy_id"),
+            case((P.policy_number.ilike(prefix, escape="\\"), SEARCH_PREFIX_SCORE["policy_number"]),
+                 else_=func.similarity(P.policy_number, q)).label("score"),
+        ).where(or_(P.policy_number.ilike(prefix, escape="\\"), P.policy_number.op("%")(q)))
+        by_name = select(
+            B.policy_id.label("policy_id"),
+            case((B.full_name.ilike(prefix, escape="\\"), SEARCH_PREFIX_SCORE["full_name"]),
+                 else_=func.word_similarity(q, B.full_name)).label("score"),
+        ).where(or_(B.full_name.ilike(prefix, escape="\\"), literal(q).op("<%")(B.full_name)))
+        hits = union_all(by_number, by_name).subquery()
+        stmt = select(hits.c.policy_id, func.max(hits.c.score).label("score")).group_by(hits.c.policy_id)
+        if coverage_code is not None:
+            stmt = stmt.where(
+                select(C.id).where(C.policy_id == hits.c.policy_id, C.coverage_code == coverage_code).exists()
+            )
+        return stmt.subquery()
+    # solo coverageCode: todas las pólizas con esa cobertura, mismo score
+    stmt = select(C.policy_id.label("policy_id"), literal(1.0).label("score")).where(C.coverage_code == coverage_code)
+    return stmt.distinct().subquery()
+
+
+@router.get("/search", response_model=List[schemas.PolicySearchHit])
+async def search_policies(
+    q: Optional[str] = Query(None, min_length=SEARCH_MIN_LENGTH, description="Prefijo o texto aproximado de policy_number o nombre de beneficiario"),
+    coverageCode: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    include: Optional[str] = Query(DEFAULT_INCLUDE, description="Colecciones hijas separadas por coma: coverages,beneficiaries"),
+    db: AsyncSession = Depends(get_read_session),
+):
+    """Resultados ordenados por score (desc) e id; paginación con limit/offset."""
+    if not q and coverageCode is None:
+        raise HTTPException(status_code=400, detail="q or coverageCode is required")
+    include_names = _parse_include(include)
+
+    hits = _search_hits(q, coverageCode)
+    res = await db.execute(
+        select(hits.c.policy_id, hits.c.score).order_by(hits.c.score.desc(), hits.c.policy_id).limit(limit).offset(offset)
+    )
+    ranked = res.all()
+    if not ranked:
+        return JSONBytesResponse([])
+
+    res = await db.execute(
+        select(models.Policy).options(*_policy_load_options(include_names))
+        .where(models.Policy.id.in_([r.policy_id for r in ranked]))
+    )
+    by_id = {p.id: p for p in _fill_excluded(res.scalars().all(), include_names)}
+    return JSONBytesResponse([
+        {"score": float(r.score), "policy": policy_serializer.to_dict(by_id[r.policy_id])}
+        for r in ranked if r.policy_id in by_id
+    ])
+
+
+# --------------------
+# STATS (agregados de cartera desde policy_summary)
+# --------------------
+STATS_GROUP_BY = ("product_id", "status", "agent_id")
+
+
+def _parse_group_by(group_by: Optional[str]) -> List[str]:
+    names = [n.strip() for n in (group_by or "").split(",") if n.strip()]
+    unknown = [n for n in names if n not in STATS_GROUP_BY]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown groupBy: {', '.join(unknown)}")
+    return [n for n in STATS_GROUP_BY if n in names]
+
+
+def _month_bound(name: str, value: Optional[date], upper: bool) -> Optional[date]:
+    # policy_summary guarda las fechas por mes: solo se filtra por meses completos
+    if value is None:
+        return None
+    if upper and (value + timedelta(days=1)).day != 1:
+        raise HTTPException(status_code=400, detail=f"{name} must be the last day of a month")
+    if not upper and value.day != 1:
+        raise HTTPException(status_code=400, detail=f"{name} must be the first day of a month")
+    return value.replace(day=1)
+
+
+@router.get("/stats", response_model=schemas.PolicyStats)
+async def policy_stats(
+    groupBy: Optional[str] = Query(",".join(STATS_GROUP_BY), description="Dimensiones separadas por coma: product_id,status,agent_id"),
+    startDateFrom: Optional[date] = Query(None),
+    startDateTo: Optional[date] = Query(None),
+    endDateFrom: Optional[date] = Query(None),
+    endDateTo: Optional[date] = Query(None, description="Los *From deben ser día 1 y los *To último día de mes"),
+    db: AsyncSession = Depends(get_read_session),
+):
+    """Totales de count/premium/sum_insured; lee policy_summary, así que no depende del tamaño de policy."""
+    group_by = _parse_group_by(groupBy)
+    S = models.PolicySummary
+    dims = [getattr(S, n) for n in group_by]
+    stmt = select(
+        *dims,
+        func.sum(S.policy_count).label("policy_count"),
+        func.sum(S.premium_total).label("premium_total"),
+        func.sum(S.sum_insured_total).label("sum_insured_total"),
+    )
+    for column, name, value, upper in (
+        (S.start_month, "startDateFrom", startDateFrom, False),
+        (S.start_month, "startDateTo", startDateTo, True),
+        (S.end_month, "endDateFrom", endDateFrom, False),
+        (S.end_month, "endDateTo", endDateTo, True),
+    ):
+        month = _month_bound(name, value, upper)
+        if month is not None:
+            stmt = stmt.where(column <= month if upper else column >= month)
+    stmt = stmt.group_by(*dims).having(func.sum(S.policy_count) > 0).order_by(*dims)
+
+    groups = [schemas.PolicyStatsRow(**row._mapping) for row in await db.execute(stmt)]
+    totals = schemas.PolicyStatsRow(
+        policy_count=sum(g.policy_count for g in groups),
+        premium_total=sum((g.premium_total for g in groups), Decimal(0)),
+        sum_insured_total=sum((g.sum_insured_total for g in groups), Decimal(0)),
+    )
+    return schemas.PolicyStats(group_by=group_by, totals=totals, groups=groups)
+
+
+# --------------------
+# EXPIRING (GET /policies/expiring: feed incremental para los workers de renovación)
+# --------------------
+EXPIRING_STATUS = "ACTIVE"  # debe coincidir con el predicado de los índices parciales ix_policy_active_*
+# margen para transacciones que confirman después del now() con el que escribieron updated_at
+EXPIRING_CHANGE_LAG_SECONDS = float(os.getenv("EXPIRING_CHANGE_LAG_SECONDS", "5"))
+
+
+def _encode_expiring_cursor(horizon: date, entered: Optional[Tuple[date, int]], changed: Tuple[datetime, int]) -> str:
+    state = {
+        "h": horizon.isoformat(),
+        "a": [entered[0].isoformat(), entered[1]] if entered else None,
+        "u": [changed[0].isoformat(), changed[1]],
+    }
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def _decode_expiring_cursor(cursor: str) -> Tuple[date, Optional[Tuple[date, int]], Tuple[datetime, int]]:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        entered = (date.fromisoformat(state["a"][0]), int(state["a"][1])) if state["a"] else None
+        return date.fromisoformat(state["h"]), entered, (datetime.fromisoformat(state["u"][0]), int(state["u"][1]))
+    except (ValueError, TypeError, KeyError, IndexError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/expiring", response_model=List[schemas.PolicyRead])
+async def expiring_policies(
+    within_days: int = Query(30, ge=0, le=366),
+    since_cursor: Optional[str] = Query(None, description=f"Valor de {NEXT_CURSOR_HEADER} de la consulta anterior"),
+    limit: int = Query(500, ge=1, le=1000),
+    include: Optional[str] = Query("", description="Colecciones hijas separadas por coma: coverages,beneficiaries"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    # primaria: la marca de agua de cambios sale de now(); una réplica atrasada se saltaría filas
+    db: AsyncSession = Depends(get_session),
+):
+    """Pólizas activas que vencen en los próximos ``within_days`` días y que entraron en la ventana o
+    cambiaron desde ``since_cursor`` (sin cursor: la ventana completa).
+
+    El cursor guarda hasta qué fecha de vencimiento ya se entregó la ventana (las que entran al pasar
+    los días se leen por ix_policy_active_end_date_id) y una marca de agua de updated_at (los cambios,
+    por ix_policy_active_updated_at_id): cada consulta cuesta lo que el trabajo nuevo. Entrega al
+    menos una vez; una página con menos de ``limit`` filas significa que no hay más por ahora.
+    """
+    fieldset = _parse_fields(fields)
+    include_names = _parse_include(include) if fieldset is None else []
+    now, today = (await db.execute(select(func.now(), func.current_date()))).one()
+    target = today + timedelta(days=within_days)
+    if since_cursor:
+        horizon, entered, changed = _decode_expiring_cursor(since_cursor)
+    else:
+        horizon, entered, changed = today - timedelta(days=1), None, (now - timedelta(seconds=EXPIRING_CHANGE_LAG_SECONDS), 0)
+
+    P = models.Policy
+    # literal (no parámetro): con planes genéricos el planificador solo casa así el predicado del índice parcial
+    in_window = [P.status == literal_column(f"'{EXPIRING_STATUS}'"), P.end_date >= today, P.end_date <= target]
+
+    async def fetch(conditions, order, size: int):
+        if fieldset is None:
+            stmt = select(P).options(*_policy_load_options(include_names))
+        else:
+            stmt = _projected_select(fieldset).add_columns(P.end_date.label("_end_date"), P.updated_at.label("_updated_at"))
+        res = await db.execute(stmt.where(*conditions).order_by(*order).limit(size))
+        return list(res.scalars().all() if fieldset is None else res.all())
+
+    def key(row, name: str):
+        return getattr(row, name if fieldset is None else f"_{name}")
+
+    # 1) pólizas que entraron en la ventana: end_date en (horizon, target]
+    rows = []
+    if horizon < target:
+        conditions = in_window + [P.end_date > horizon]
+        if entered:
+            conditions.append(tuple_(P.end_date, P.id) > tuple_(*entered))
+        rows = await fetch(conditions, (P.end_date, P.id), limit)
+        if len(rows) == limit:
+            entered = (key(rows[-1], "end_date"), rows[-1].id)
+        else:
+            horizon, entered = target, None
+    else:
+        entered = None  # la ventana se acortó: no hay nada nuevo que entre
+
+    # 2) pólizas de la ventana que cambiaron desde la marca de agua
+    if since_cursor and len(rows) < limit:
+        size = limit - len(rows)
+        changes = await fetch(in_window + [tuple_(P.updated_at, P.id) > tuple_(*changed)], (P.updated_at, P.id), size)
+        if len(changes) == size:
+            changed = (key(changes[-1], "updated_at"), changes[-1].id)
+        else:
+            changed = max(changed, (now - timedelta(seconds=EXPIRING_CHANGE_LAG_SECONDS), 0))
+        seen = {row.id for row in rows}
+        rows += [row for row in changes if row.id not in seen]  # ya entregadas en el paso 1 con su estado actual
+
+    if fieldset is None:
+        body = policy_serializer.to_list(_fill_excluded(rows, include_names))
+    else:
+        body = await _project_policies(db, rows, fieldset)
+    return JSONBytesResponse(body, headers={NEXT_CURSOR_HEADER: _encode_expiring_cursor(horizon, entered, changed)})
 
 
 @router.get("/{policy_id}", response_model=schemas.PolicyRead)
-async def get_policy(policy_id: int, db: AsyncSession = Depends(get_session)):
-    policy = await _get_policy_or_404(db, policy_id)
-    coverages = await _load_coverages_for_policy(db, policy_id)
-    # optionally attach beneficiaries if you want them in policy detail:
-    # beneficiaries = await _load_beneficiaries_for_policy(db, policy_id)
-    policy.coverages = coverages
-    return policy
+async def get_policy(
+    request: Request,
+    policy_id: int,
+    include: Optional[str] = Query(DEFAULT_INCLUDE, description="Colecciones hijas separadas por coma: coverages,beneficiaries"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include_archived: bool = Query(False, description="Si no está viva, buscarla en policy_archive"),
+):
+    fieldset = _parse_fields(fields)
+    if fieldset is not None:
+        variant = f"fields={_fields_variant(fieldset)}"
 
+        async def build(db: AsyncSession):
+            res = await db.execute(_projected_select(fieldset).where(models.Policy.id == policy_id))
+            row = res.one_or_none()
+            if row is None:
+                raise HTTPException(status_code=404, detail="Policy not found")
+            return (await _project_policies(db, [row], fieldset))[0]
+    else:
+        include_names = _parse_include(include)
+        variant = "+".join(sorted(include_names)) or "-"
 
-@router.post("/", response_model=schemas.PolicyRead, status_code=status.HTTP_201_CREATED)
+        async def build(db: AsyncSession):
+            return policy_serializer.to_dict(await _load_policy(db, policy_id, include_names))
+
+    try:
+        return await _versioned_response(request, policy_id, variant, build)
+    except HTTPException as exc:
+        if exc.status_code != status.HTTP_404_NOT_FOUND or not include_archived:
+            raise
+    return await _archived_response(request, policy_id, variant, fieldset or _include_fieldset(include_names))
+
+
+async def _archived_response(request: Request, policy_id: int, variant: str, fieldset: FieldSet) -> Response:
+    """include_archived: la póliza ya está en policy_archive. Es inmutable, así que conserva el ETag
+    de su última versión viva (un cliente con la copia vigente recibe 304); sin caché de cuerpos."""
+    A = models.PolicyArchive
+    async with read_sessionmaker(request)() as db:
+        res = await db.execute(_projected_select(fieldset, A).add_columns(A.version.label("_version")).where(A.id == policy_id))
+        row = res.one_or_none()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Policy not found")
+        body = dumps((await _project_policies(db, [row], fieldset, archived=True))[0])
+    return _etag_response(request, policy_id, row._version, variant, body)
+
+
+@router.post("/", response_model=schemas.PolicyRead, status_code=status.HTTP_201_CREATED, dependencies=[Depends(remember_write)])
 async def create_policy(policy_in: schemas.PolicyCreate, db: AsyncSession = Depends(get_session)):
     # validar producto existe (product_id es código)
-    prod_res = await db.execute(select(models.Product).where(models.Product.code == policy_in.product_id))
-    product = prod_res.scalar_one_or_none()
+    product = await product_cache.get_by_code(db, policy_in.product_id)
     if not product:
         raise HTTPException(status_code=400, detail="Product not found")
 
-    # crear póliza (excluyendo coverages si vienen)
+    # crear póliza (excluyendo coverages si vienen): INSERT ... RETURNING, sin refresh posterior
     policy_data = policy_in.model_dump(exclude={"coverages"}) if hasattr(policy_in, "model_dump") else policy_in.dict(exclude={"coverages"})
-    db_policy = models.Policy(**policy_data)
-    db.add(db_policy)
-    await db.flush()  # para tener db_policy.id
+    try:
+        res = await db.execute(insert(models.Policy).values(**policy_data).returning(models.Policy))
+    except IntegrityError as exc:
+        await db.rollback()
+        if getattr(exc.orig, "sqlstate", None) == FOREIGN_KEY_VIOLATION:
+            # producto borrado después de cachearse (la FK a product.code es la fuente de verdad)
+            product_cache.invalidate()
+            raise HTTPException(status_code=400, detail="Product not found")
+        raise
+    db_policy = res.scalar_one()
+    await record_created(db, [db_policy])
 
-    # insertar coberturas si vienen
+    # insertar coberturas si vienen: un único INSERT multi-fila ... RETURNING
+    coverages: List[models.PolicyCoverage] = []
     if getattr(policy_in, "coverages", None):
-        for cov in policy_in.coverages:
-            cov_data = cov.model_dump() if hasattr(cov, "model_dump") else cov.dict()
-            cov_obj = models.PolicyCoverage(policy_id=db_policy.id, **cov_data)
-            db.add(cov_obj)
+        cov_rows = [{"policy_id": db_policy.id, **cov.model_dump()} for cov in policy_in.coverages]
+        cov_res = await db.execute(insert(models.PolicyCoverage).returning(models.PolicyCoverage), cov_rows)
+        coverages = cov_res.scalars().all()
 
+    await outbox.record(db, [outbox.event("policy", "created", db_policy), *(outbox.event("coverage", "created", c) for c in coverages)])
     await db.commit()
-    await db.refresh(db_policy)
-    # cargar coverages para la respuesta
-    db_policy.coverages = await _load_coverages_for_policy(db, db_policy.id)
-    return db_policy
+    set_committed_value(db_policy, "coverages", coverages)
+    return _fill_excluded([db_policy], [DEFAULT_INCLUDE])[0]
+
+
+# --------------------
+# BULK IMPORT (POST /policies:bulk)
+# --------------------
+BULK_BATCH_SIZE = 1000
+
+
+async def _iter_bulk_items(request: Request):
+    """Produce (index, item) desde un array JSON o un stream NDJSON (application/x-ndjson)."""
+    if "ndjson" in request.headers.get("content-type", ""):
+        index = 0
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield index, line
+                    index += 1
+        if buffer.strip():
+            yield index, buffer
+        return
+
+    try:
+        items = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    for index, item in enumerate(items):
+        yield index, item
+
 
+def _parse_bulk_item(item) -> schemas.PolicyCreate:
+    if isinstance(item, (bytes, str)):
+        return schemas.PolicyCreate.model_validate_json(item)
+    return schemas.PolicyCreate.model_validate(item)
 
-@router.patch("/{policy_id}", response_model=schemas.PolicyRead)
+
+async def _insert_policy_batch(
+    db: AsyncSession,
+    batch: List[Tuple[int, schemas.PolicyCreate]],
+    results: List[schemas.PolicyBulkItemResult],
+):
+    # una sola consulta de productos por lote
+    codes = {p.product_id for _, p in batch}
+    prod_res = await db.execute(select(models.Product.code).where(models.Product.code.in_(codes)))
+    known_codes = set(prod_res.scalars().all())
+
+    valid: List[Tuple[int, schemas.PolicyCreate]] = []
+    for index, p in batch:
+        if p.product_id not in known_codes:
+            results.append(schemas.PolicyBulkItemResult(index=index, status="error", policy_number=p.policy_number, error="Product not found"))
+        else:
+            valid.append((index, p))
+    if not valid:
+        return
+
+    # INSERT multi-fila; los policy_number ya existentes no abortan el lote (ON CONFLICT DO NOTHING)
+    stmt = (
+        pg_insert(models.Policy)
+        .on_conflict_do_nothing(index_elements=[models.Policy.policy_number])
+        .returning(*[getattr(models.Policy, f) for f in outbox.ENTITY_FIELDS["policy"]])
+    )
+    try:
+        res = await db.execute(stmt, [p.model_dump(exclude={"coverages"}) for _, p in valid])
+        created = res.mappings().all()
+        ids = {row["policy_number"]: row["id"] for row in created}
+        await record_created(db, [p for _, p in valid if p.policy_number in ids])
+        events = [outbox.event("policy", "created", row) for row in created]
+
+        cov_rows = [
+            {"policy_id": ids[p.policy_number], **cov.model_dump()}
+            for _, p in valid if p.policy_number in ids
+            for cov in (p.coverages or [])
+        ]
+        if cov_rows:
+            cov_res = await db.execute(insert(models.PolicyCoverage).returning(models.PolicyCoverage), cov_rows)
+            events += [outbox.event("coverage", "created", c) for c in cov_res.scalars()]
+        await outbox.record(db, events)
+        await db.commit()
+    except SQLAlchemyError as exc:
+        await db.rollback()
+        for index, p in valid:
+            results.append(schemas.PolicyBulkItemResult(index=index, status="error", policy_number=p.policy_number, error=f"Batch failed: {exc.__class__.__name__}"))
+        return
+
+    for index, p in valid:
+        if p.policy_number in ids:
+            results.append(schemas.PolicyBulkItemResult(index=index, status="created", id=ids[p.policy_number], policy_number=p.policy_number))
+        else:
+            results.append(schemas.PolicyBulkItemResult(index=index, status="error", policy_number=p.policy_number, error="Policy number already exists"))
+
+
+@router.post(
+    ":bulk",
+    response_model=schemas.PolicyBulkResult,
+    dependencies=[Depends(remember_write)],
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/PolicyCreate"}}},
+        "application/x-ndjson": {"schema": {"type": "string"}},
+    }}},
+)
+async def bulk_create_policies(request: Request, db: AsyncSession = Depends(get_session)):
+    """Alta masiva: array JSON o NDJSON de PolicyCreate, insertado en lotes de BULK_BATCH_SIZE."""
+    results: List[schemas.PolicyBulkItemResult] = []
+    batch: List[Tuple[int, schemas.PolicyCreate]] = []
+    seen_numbers = set()
+    total = 0
+
+    async for index, item in _iter_bulk_items(request):
+        total += 1
+        try:
+            policy_in = _parse_bulk_item(item)
+        except ValidationError as exc:
+            results.append(schemas.PolicyBulkItemResult(index=index, status="error", error="; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors())))
+            continue
+        if policy_in.policy_number in seen_numbers:
+            results.append(schemas.PolicyBulkItemResult(index=index, status="error", policy_number=policy_in.policy_number, error="Duplicate policy number in request"))
+            continue
+        seen_numbers.add(policy_in.policy_number)
+        batch.append((index, policy_in))
+        if len(batch) >= BULK_BATCH_SIZE:
+            await _insert_policy_batch(db, batch, results)
+            batch = []
+    if batch:
+        await _insert_policy_batch(db, batch, results)
+
+    results.sort(key=lambda r: r.index)
+    created = sum(1 for r in results if r.status == "created")
+    return schemas.PolicyBulkResult(total=total, created=created, failed=total - created, results=results)
+
+
+# --------------------
+# BATCH GET (POST /policies:batchGet)
+# --------------------
+@router.post(":batchGet", response_model=schemas.PolicyBatchGetResult)
+async def batch_get_policies(
+    body: schemas.PolicyBatchGetRequest,
+    include: Optional[str] = Query(DEFAULT_INCLUDE, description="Colecciones hijas separadas por coma: coverages,beneficiaries"),
+    db: AsyncSession = Depends(get_read_session),
+):
+    """Resuelve hasta BATCH_GET_MAX_ITEMS ids / policy_numbers con 1 + len(include) consultas."""
+    include_names = _parse_include(include)
+    _check_batch_size("keys", len(body.ids) + len(body.policy_numbers))
+
+    by_id: Dict[int, Dict[str, Any]] = {}
+    by_number: Dict[str, Dict[str, Any]] = {}
+    if body.ids or body.policy_numbers:
+        conditions = []
+        if body.ids:
+            conditions.append(models.Policy.id.in_(set(body.ids)))
+        if body.policy_numbers:
+            conditions.append(models.Policy.policy_number.in_(set(body.policy_numbers)))
+        stmt = select(models.Policy).options(*_policy_load_options(include_names)).where(or_(*conditions))
+        res = await db.execute(stmt)
+        for p in _fill_excluded(res.scalars().all(), include_names):
+            data = policy_serializer.to_dict(p)
+            by_id[p.id] = by_number[p.policy_number] = data
+
+    results = [
+        {"id": pid, "policy_number": None, "found": pid in by_id, "policy": by_id.get(pid)} for pid in body.ids
+    ] + [
+        {"id": None, "policy_number": num, "found": num in by_number, "policy": by_number.get(num)} for num in body.policy_numbers
+    ]
+    return JSONBytesResponse({"results": results})
+
+
+# --------------------
+# OPERACIONES MASIVAS EN SEGUNDO PLANO (jobs, ver app/jobs.py y app/policy_lifecycle.py)
+# --------------------
+def _bulk_params(body) -> Dict[str, Any]:
+    f = body.filter
+    if f.customer_id is None and f.agent_id is None and f.product_id is None:
+        raise HTTPException(status_code=400, detail="filter requires customer_id, agent_id or product_id")
+    if f.end_date_from and f.end_date_to and f.end_date_from > f.end_date_to:
+        raise HTTPException(status_code=400, detail="end_date_from must be <= end_date_to")
+    return body.model_dump(mode="json")
+
+
+@router.post(":bulkUpdateStatus", response_model=schemas.JobRead, status_code=status.HTTP_202_ACCEPTED, dependencies=[Depends(remember_write)])
+async def bulk_update_status(body: schemas.PolicyBulkUpdateStatus, db: AsyncSession = Depends(get_session)):
+    """Cambia el estado de todas las pólizas del filtro en lotes de JOB_CHUNK_SIZE; progreso en GET /jobs/{id}."""
+    job = await job_runner.submit(db, policy_lifecycle.BULK_UPDATE_STATUS, _bulk_params(body))
+    return schemas.JobRead.model_validate(job)
+
+
+@router.post(":bulkRenew", response_model=schemas.JobRead, status_code=status.HTTP_202_ACCEPTED, dependencies=[Depends(remember_write)])
+async def bulk_renew(body: schemas.PolicyBulkRenew, db: AsyncSession = Depends(get_session)):
+    """Desplaza start_date/end_date ``months`` meses para todas las pólizas del filtro (job en segundo plano)."""
+    if body.months == 0:
+        raise HTTPException(status_code=400, detail="months must not be 0")
+    job = await job_runner.submit(db, policy_lifecycle.BULK_RENEW, _bulk_params(body))
+    return schemas.JobRead.model_validate(job)
+
+
+@router.post(":archive", response_model=schemas.JobRead, status_code=status.HTTP_202_ACCEPTED, dependencies=[Depends(remember_write)])
+async def archive_policies(body: Optional[schemas.PolicyArchiveRequest] = None, db: AsyncSession = Depends(get_session)):
+    """Mueve al archivo las pólizas fuera de la ventana de retención (job en segundo plano)."""
+    body = body or schemas.PolicyArchiveRequest()
+    if any(d is not None and d < 0 for d in (body.cancelled_days, body.expired_days)):
+        raise HTTPException(status_code=400, detail="retention days must be >= 0")
+    job = await job_runner.submit(db, policy_archive.ARCHIVE, policy_archive.archive_params(body.cancelled_days, body.expired_days))
+    return schemas.JobRead.model_validate(job)
+
+
+@router.patch("/{policy_id}", response_model=schemas.PolicyRead, dependencies=[Depends(remember_write)])
 async def patch_policy(policy_id: int, policy_update: schemas.PolicyUpdate, db: AsyncSession = Depends(get_session)):
-    policy = await _get_policy_or_404(db, policy_id)
     update_data = policy_update.model_dump(exclude_unset=True) if hasattr(policy_update, "model_dump") else policy_update.dict(exclude_unset=True)
-    for k, v in update_data.items():
-        setattr(policy, k, v)
+    # el resumen necesita los valores previos: se leen con la fila bloqueada antes del UPDATE
+    old = await snapshot(db, policy_id) if any(f in update_data for f in SUMMARY_FIELDS) else None
+    if update_data:
+        update_data.update(_version_bump())
+    policy = await _update_returning(db, models.Policy, [models.Policy.id == policy_id], update_data, "Policy not found")
+    if old is not None:
+        deltas = SummaryDeltas()
+        deltas.move(old, policy)
+        await apply_deltas(db, deltas)
+    if update_data:
+        await outbox.record(db, [outbox.event("policy", "updated", policy)])
+    set_committed_value(policy, "coverages", await _load_coverages_for_policy(db, policy_id))
     await db.commit()
-    await db.refresh(policy)
-    policy.coverages = await _load_coverages_for_policy(db, policy.id)
-    return policy
+    return _fill_excluded([policy], [DEFAULT_INCLUDE])[0]
 
 
-@router.delete("/{policy_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{policy_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(remember_write)])
 async def delete_policy(policy_id: int, hard: bool = Query(False, description="If true, delete from DB; otherwise mark CANCELLED"), db: AsyncSession = Depends(get_session)):
-    policy = await _get_policy_or_404(db, policy_id)
+    deltas = SummaryDeltas()
     if hard:
-        await db.delete(policy)
+        res = await db.execute(
+            delete(models.Policy).where(models.Policy.id == policy_id)
+            .returning(*[getattr(models.Policy, f) for f in SUMMARY_FIELDS])
+        )
+        row = res.one_or_none()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Policy not found")
+        deltas.add(row._mapping, -1)
+        await apply_deltas(db, deltas)
+        await outbox.record(db, [outbox.event("policy", "deleted", policy_id=policy_id, entity_id=policy_id)])
         await db.commit()
         return
     # soft cancel
-    policy.status = "CANCELLED"
+    old = await snapshot(db, policy_id)
+    policy = await _update_returning(db, models.Policy, [models.Policy.id == policy_id], {"status": "CANCELLED", **_version_bump()}, "Policy not found")
+    deltas.move(old, policy)
+    await apply_deltas(db, deltas)
+    await outbox.record(db, [outbox.event("policy", "cancelled", policy)])
     await db.commit()
     return
 
@@ -132,58 +1062,52 @@ async def delete_policy(policy_id: int, hard: bool = Query(False, description="I
 # ============================================================
 
 @router.get("/{policy_id}/coverages", response_model=List[schemas.PolicyCoverageRead])
-async def list_coverages(policy_id: int, db: AsyncSession = Depends(get_session)):
-    # valida existencia de policy
-    await _get_policy_or_404(db, policy_id)
-    res = await db.execute(select(models.PolicyCoverage).where(models.PolicyCoverage.policy_id == policy_id))
-    coverages = res.scalars().all()
-    return coverages
+async def list_coverages(request: Request, policy_id: int):
+    # la consulta de versión valida también la existencia de la policy
+    async def build(db: AsyncSession):
+        return coverage_serializer.to_list(await _load_coverages_for_policy(db, policy_id))
+
+    return await _versioned_response(request, policy_id, "coverages-list", build)
 
 
 @router.get("/{policy_id}/coverages/{coverage_id}", response_model=schemas.PolicyCoverageRead)
-async def get_coverage(policy_id: int, coverage_id: int, db: AsyncSession = Depends(get_session)):
+async def get_coverage(policy_id: int, coverage_id: int, db: AsyncSession = Depends(get_read_session)):
     await _get_policy_or_404(db, policy_id)
     res = await db.execute(select(models.PolicyCoverage).where(models.PolicyCoverage.id == coverage_id, models.PolicyCoverage.policy_id == policy_id))
     coverage = res.scalar_one_or_none()
     if not coverage:
         raise HTTPException(status_code=404, detail="Coverage not found")
-    return coverage
+    return JSONBytesResponse(coverage_serializer.to_dict(coverage))
 
 
-@router.post("/{policy_id}/coverages", response_model=schemas.PolicyCoverageRead, status_code=status.HTTP_201_CREATED)
+@router.post("/{policy_id}/coverages", response_model=schemas.PolicyCoverageRead, status_code=status.HTTP_201_CREATED, dependencies=[Depends(remember_write)])
 async def create_coverage(policy_id: int, coverage_in: schemas.PolicyCoverageCreate, db: AsyncSession = Depends(get_session)):
-    await _get_policy_or_404(db, policy_id)
     cov_data = coverage_in.model_dump() if hasattr(coverage_in, "model_dump") else coverage_in.dict()
-    cov = models.PolicyCoverage(policy_id=policy_id, **cov_data)
-    db.add(cov)
+    await _touch_policy(db, policy_id)
+    cov = await _insert_returning(db, models.PolicyCoverage, {"policy_id": policy_id, **cov_data}, "Policy not found")
+    await outbox.record(db, [outbox.event("coverage", "created", cov)])
     await db.commit()
-    await db.refresh(cov)
     return cov
 
 
-@router.patch("/{policy_id}/coverages/{coverage_id}", response_model=schemas.PolicyCoverageRead)
+@router.patch("/{policy_id}/coverages/{coverage_id}", response_model=schemas.PolicyCoverageRead, dependencies=[Depends(remember_write)])
 async def patch_coverage(policy_id: int, coverage_id: int, coverage_update: schemas.PolicyCoverageUpdate, db: AsyncSession = Depends(get_session)):
-    await _get_policy_or_404(db, policy_id)
-    res = await db.execute(select(models.PolicyCoverage).where(models.PolicyCoverage.id == coverage_id, models.PolicyCoverage.policy_id == policy_id))
-    coverage = res.scalar_one_or_none()
-    if not coverage:
-        raise HTTPException(status_code=404, detail="Coverage not found")
     upd = coverage_update.model_dump(exclude_unset=True) if hasattr(coverage_update, "model_dump") else coverage_update.dict(exclude_unset=True)
-    for k, v in upd.items():
-        setattr(coverage, k, v)
+    conditions = [models.PolicyCoverage.id == coverage_id, models.PolicyCoverage.policy_id == policy_id]
+    coverage = await _update_returning(db, models.PolicyCoverage, conditions, upd, "Coverage not found")
+    if upd:
+        await _touch_policy(db, policy_id)
+        await outbox.record(db, [outbox.event("coverage", "updated", coverage)])
     await db.commit()
-    await db.refresh(coverage)
     return coverage
 
 
-@router.delete("/{policy_id}/coverages/{coverage_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{policy_id}/coverages/{coverage_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(remember_write)])
 async def delete_coverage(policy_id: int, coverage_id: int, db: AsyncSession = Depends(get_session)):
-    await _get_policy_or_404(db, policy_id)
-    res = await db.execute(select(models.PolicyCoverage).where(models.PolicyCoverage.id == coverage_id, models.PolicyCoverage.policy_id == policy_id))
-    coverage = res.scalar_one_or_none()
-    if not coverage:
-        raise HTTPException(status_code=404, detail="Coverage not found")
-    await db.delete(coverage)
+    conditions = [models.PolicyCoverage.id == coverage_id, models.PolicyCoverage.policy_id == policy_id]
+    await _delete_returning(db, models.PolicyCoverage, conditions, "Coverage not found")
+    await _touch_policy(db, policy_id)
+    await outbox.record(db, [outbox.event("coverage", "deleted", policy_id=policy_id, entity_id=coverage_id)])
     await db.commit()
     return
 
@@ -193,56 +1117,50 @@ async def delete_coverage(policy_id: int, coverage_id: int, db: AsyncSession = D
 # ============================================================
 
 @router.get("/{policy_id}/beneficiaries", response_model=List[schemas.BeneficiaryRead])
-async def list_beneficiaries(policy_id: int, db: AsyncSession = Depends(get_session)):
-    await _get_policy_or_404(db, policy_id)
-    res = await db.execute(select(models.Beneficiary).where(models.Beneficiary.policy_id == policy_id))
-    beneficiaries = res.scalars().all()
-    return beneficiaries
+async def list_beneficiaries(request: Request, policy_id: int):
+    async def build(db: AsyncSession):
+        return beneficiary_serializer.to_list(await _load_beneficiaries_for_policy(db, policy_id))
+
+    return await _versioned_response(request, policy_id, "beneficiaries-list", build)
 
 
 @router.get("/{policy_id}/beneficiaries/{beneficiary_id}", response_model=schemas.BeneficiaryRead)
-async def get_beneficiary(policy_id: int, beneficiary_id: int, db: AsyncSession = Depends(get_session)):
+async def get_beneficiary(policy_id: int, beneficiary_id: int, db: AsyncSession = Depends(get_read_session)):
     await _get_policy_or_404(db, policy_id)
     res = await db.execute(select(models.Beneficiary).where(models.Beneficiary.id == beneficiary_id, models.Beneficiary.policy_id == policy_id))
     ben = res.scalar_one_or_none()
     if not ben:
         raise HTTPException(status_code=404, detail="Beneficiary not found")
-    return ben
+    return JSONBytesResponse(beneficiary_serializer.to_dict(ben))
 
 
-@router.post("/{policy_id}/beneficiaries", response_model=schemas.BeneficiaryRead, status_code=status.HTTP_201_CREATED)
+@router.post("/{policy_id}/beneficiaries", response_model=schemas.BeneficiaryRead, status_code=status.HTTP_201_CREATED, dependencies=[Depends(remember_write)])
 async def create_beneficiary(policy_id: int, beneficiary_in: schemas.BeneficiaryCreate, db: AsyncSession = Depends(get_session)):
-    await _get_policy_or_404(db, policy_id)
     ben_data = beneficiary_in.model_dump() if hasattr(beneficiary_in, "model_dump") else beneficiary_in.dict()
-    ben = models.Beneficiary(policy_id=policy_id, **ben_data)
-    db.add(ben)
+    await _touch_policy(db, policy_id)
+    ben = await _insert_returning(db, models.Beneficiary, {"policy_id": policy_id, **ben_data}, "Policy not found")
+    await outbox.record(db, [outbox.event("beneficiary", "created", ben)])
     await db.commit()
-    await db.refresh(ben)
     return ben
 
 
-@router.patch("/{policy_id}/beneficiaries/{beneficiary_id}", response_model=schemas.BeneficiaryRead)
+@router.patch("/{policy_id}/beneficiaries/{beneficiary_id}", response_model=schemas.BeneficiaryRead, dependencies=[Depends(remember_write)])
 async def patch_beneficiary(policy_id: int, beneficiary_id: int, beneficiary_update: schemas.BeneficiaryUpdate, db: AsyncSession = Depends(get_session)):
-    await _get_policy_or_404(db, policy_id)
-    res = await db.execute(select(models.Beneficiary).where(models.Beneficiary.id == beneficiary_id, models.Beneficiary.policy_id == policy_id))
-    ben = res.scalar_one_or_none()
-    if not ben:
-        raise HTTPException(status_code=404, detail="Beneficiary not found")
     upd = beneficiary_update.model_dump(exclude_unset=True) if hasattr(beneficiary_update, "model_dump") else beneficiary_update.dict(exclude_unset=True)
-    for k, v in upd.items():
-        setattr(ben, k, v)
+    conditions = [models.Beneficiary.id == beneficiary_id, models.Beneficiary.policy_id == policy_id]
+    ben = await _update_returning(db, models.Beneficiary, conditions, upd, "Beneficiary not found")
+    if upd:
+        await _touch_policy(db, policy_id)
+        await outbox.record(db, [outbox.event("beneficiary", "updated", ben)])
     await db.commit()
-    await db.refresh(ben)
     return ben
 
 
-@router.delete("/{policy_id}/beneficiaries/{beneficiary_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{policy_id}/beneficiaries/{beneficiary_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(remember_write)])
 async def delete_beneficiary(policy_id: int, beneficiary_id: int, db: AsyncSession = Depends(get_session)):
-    await _get_policy_or_404(db, policy_id)
-    res = await db.execute(select(models.Beneficiary).where(models.Beneficiary.id == beneficiary_id, models.Beneficiary.policy_id == policy_id))
-    ben = res.scalar_one_or_none()
-    if not ben:
-        raise HTTPException(status_code=404, detail="Beneficiary not found")
-    await db.delete(ben)
+    conditions = [models.Beneficiary.id == beneficiary_id, models.Beneficiary.policy_id == policy_id]
+    await _delete_returning(db, models.Beneficiary, conditions, "Beneficiary not found")
+    await _touch_policy(db, policy_id)
+    await outbox.record(db, [outbox.event("beneficiary", "deleted", policy_id=policy_id, entity_id=beneficiary_id)])
     await db.commit()
     return
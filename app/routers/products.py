@@ -1,46 +1,74 @@
 # app/routers/product.py
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import Response
+from sqlalchemy import delete, insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 from typing import List
 
 from .. import models, schemas
-from ..db import get_session
+from ..db import AsyncSessionLocal, get_session
+from ..product_cache import notify_product_change, product_cache
+from ..serializers import dumps, product_serializer
+from ..singleflight import SingleFlight
 
 router = APIRouter(
     prefix="/products",
     tags=["products"],
 )
 
+# en un fallo de caché, las peticiones concurrentes comparten una sola consulta (ver app/singleflight.py)
+product_reads = SingleFlight("product")
+# los fallos de caché se cargan siempre de la primaria: una réplica atrasada repoblaría la caché con
+# productos ya cambiados o borrados justo después del NOTIFY, y nada la volvería a invalidar hasta el TTL.
+# Con la caché caliente estas lecturas no tocan la base.
+
 # --------------------
 # GET /products
 # --------------------
 @router.get("/", response_model=List[schemas.ProductRead])
-async def get_products(db: AsyncSession = Depends(get_session)):
-    result = await db.execute(select(models.Product))
-    products = result.scalars().all()
-    return products
+async def get_products():
+    async def fetch():
+        async with AsyncSessionLocal() as db:
+            return dumps(product_serializer.to_list(await product_cache.get_all(db)))
+
+    return Response(await product_reads.do(("all",), fetch), media_type="application/json")
+
+# --------------------
+# GET /products/cache-stats
+# --------------------
+@router.get("/cache-stats")
+async def get_product_cache_stats():
+    # contadores del worker que atiende la petición
+    return product_cache.stats()
 
 # --------------------
 # GET /products/{id}
 # --------------------
-@router.get("/{id}", response_model=schemas.ProductRead)
-async def get_product(id: int, db: AsyncSession = Depends(get_session)):
-    result = await db.execute(select(models.Product).where(models.Product.id == id))
-    product = result.scalar_one_or_none()
+async def _get_product_or_404(db: AsyncSession, id: int) -> schemas.ProductRead:
+    product = await product_cache.get_by_id(db, id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     return product
 
+
+@router.get("/{id}", response_model=schemas.ProductRead)
+async def get_product(id: int):
+    async def fetch():
+        async with AsyncSessionLocal() as db:
+            return dumps(product_serializer.to_dict(await _get_product_or_404(db, id)))
+
+    return Response(await product_reads.do(("id", id), fetch), media_type="application/json")
+
 # --------------------
 # POST /products
 # --------------------
 @router.post("/", response_model=schemas.ProductRead)
 async def create_product(product_in: schemas.ProductCreate, db: AsyncSession = Depends(get_session)):
-    db_product = models.Product(**product_in.dict())
-    db.add(db_product)
+    result = await db.execute(insert(models.Product).values(**product_in.dict()).returning(models.Product))
+    db_product = result.scalar_one()
+    await notify_product_change(db)
     await db.commit()
-    await db.refresh(db_product)
+    product_cache.invalidate()
     return db_product
 
 # --------------------
@@ -48,18 +76,20 @@ async def create_product(product_in: schemas.ProductCreate, db: AsyncSession = D
 # --------------------
 @router.patch("/{id}", response_model=schemas.ProductRead)
 async def patch_product(id: int, product_update: schemas.ProductUpdate, db: AsyncSession = Depends(get_session)):
-    result = await db.execute(select(models.Product).where(models.Product.id == id))
+    update_data = product_update.model_dump(exclude_unset=True) if hasattr(product_update, "model_dump") else product_update.dict(exclude_unset=True)
+    if not update_data:
+        return await _get_product_or_404(db, id)
+
+    # UPDATE ... RETURNING: existencia, escritura y lectura en una sola sentencia
+    stmt = update(models.Product).where(models.Product.id == id).values(**update_data).returning(models.Product)
+    result = await db.execute(stmt.execution_options(populate_existing=True))
     product = result.scalar_one_or_none()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    update_data = product_update.model_dump(exclude_unset=True) if hasattr(product_update, "model_dump") else product_update.dict(exclude_unset=True)
-
-    for key, value in update_data.items():
-        setattr(product, key, value)
-
+    await notify_product_change(db)
     await db.commit()
-    await db.refresh(product)
+    product_cache.invalidate()
     return product
 
 # --------------------
@@ -67,11 +97,11 @@ async def patch_product(id: int, product_update: schemas.ProductUpdate, db: Asyn
 # --------------------
 @router.delete("/{id}")
 async def delete_product(id: int, db: AsyncSession = Depends(get_session)):
-    result = await db.execute(select(models.Product).where(models.Product.id == id))
-    product = result.scalar_one_or_none()
-    if not product:
+    result = await db.execute(delete(models.Product).where(models.Product.id == id).returning(models.Product.id))
+    if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    await db.delete(product)
+    await notify_product_change(db)
     await db.commit()
+    product_cache.invalidate()
     return {"detail": "Product deleted successfully"}
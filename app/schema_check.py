@@ -0,0 +1,51 @@
+# app/schema_check.py
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+logger = logging.getLogger(__name__)
+
+# strict: no arrancar si la base está por detrás de las migraciones; warn: solo registrarlo; off: no consultar
+DB_SCHEMA_CHECK = os.getenv("DB_SCHEMA_CHECK", "strict").strip().lower()
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+
+def _script_directory() -> ScriptDirectory:
+    return ScriptDirectory.from_config(Config(str(ALEMBIC_INI)))
+
+
+async def _current_revision(engine) -> Optional[str]:
+    try:
+        async with engine.connect() as conn:
+            return (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar()
+    except ProgrammingError:  # alembic_version no existe: base sin migrar
+        return None
+
+
+async def check_schema(engine):
+    """Una sola consulta a alembic_version al arrancar (en lugar de create_all en cada worker).
+
+    La base por delante del código (migración ya aplicada durante un despliegue gradual) es normal
+    y solo se registra; por detrás o sin migrar falla en modo strict.
+    """
+    if DB_SCHEMA_CHECK == "off":
+        return
+    script = _script_directory()
+    head = script.get_current_head()
+    current = await _current_revision(engine)
+    if current == head:
+        return
+    known = current is not None and any(rev.revision == current for rev in script.walk_revisions())
+    if current is not None and not known:
+        logger.warning("database schema revision %s is newer than this code (head %s)", current, head)
+        return
+    message = f"database schema revision {current or '<none>'} is behind {head}: run `alembic upgrade head`"
+    if DB_SCHEMA_CHECK == "strict":
+        raise RuntimeError(message)
+    logger.error(message)
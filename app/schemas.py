@@ -112,13 +112,131 @@ class PolicyUpdate(BaseModel):
 class PolicyRead(PolicyBase):
     id: int
     created_at: Optional[datetime] = None        # si quieres exponer created_at
+    updated_at: Optional[datetime] = None
+    version: int = 1  # mismo valor que el ETag de GET /policies/{policy_id}
     coverages: List[PolicyCoverageRead] = []
-    # opcional: beneficiaries si quieres incluirlos en el detalle
-    # beneficiaries: List[BeneficiaryRead] = []
+    # solo se rellena con include=beneficiaries (si no, lista vacía)
+    beneficiaries: List[BeneficiaryRead] = []
 
     class Config:
         from_attributes = True
 
+# --------------------
+# POLICY BULK IMPORT
+# --------------------
+class PolicyBulkItemResult(BaseModel):
+    index: int  # posición del ítem en el cuerpo (0-based)
+    status: str  # "created" | "error"
+    id: Optional[int] = None
+    policy_number: Optional[str] = None
+    error: Optional[str] = None
+
+class PolicyBulkResult(BaseModel):
+    total: int
+    created: int
+    failed: int
+    results: List[PolicyBulkItemResult] = []
+
+# --------------------
+# POLICY STATS
+# --------------------
+class PolicyStatsRow(BaseModel):
+    # dimensiones no agrupadas quedan en null
+    product_id: Optional[str] = None
+    status: Optional[str] = None
+    agent_id: Optional[str] = None
+    policy_count: int
+    premium_total: Decimal
+    sum_insured_total: Decimal
+
+class PolicyStats(BaseModel):
+    group_by: List[str]
+    totals: PolicyStatsRow
+    groups: List[PolicyStatsRow] = []
+
+# --------------------
+# POLICY SEARCH
+# --------------------
+class PolicySearchHit(BaseModel):
+    score: float  # 1.0 = prefijo de policy_number; menor = coincidencia aproximada
+    policy: PolicyRead
+
+# --------------------
+# POLICY BATCH GET
+# --------------------
+class PolicyBatchGetRequest(BaseModel):
+    ids: List[int] = []
+    policy_numbers: List[str] = []
+
+class PolicyBatchGetItem(BaseModel):
+    # clave pedida (id o policy_number) y la póliza si existe
+    id: Optional[int] = None
+    policy_number: Optional[str] = None
+    found: bool
+    policy: Optional[PolicyRead] = None
+
+class PolicyBatchGetResult(BaseModel):
+    results: List[PolicyBatchGetItem] = []  # mismo orden que la petición: ids y luego policy_numbers
+
+# --------------------
+# POLICY BULK LIFECYCLE (jobs)
+# --------------------
+class PolicyBulkFilter(BaseModel):
+    # al menos uno de customer_id / agent_id / product_id (no se permite "todas las pólizas")
+    customer_id: Optional[int] = None
+    agent_id: Optional[str] = None
+    product_id: Optional[str] = None
+    status: Optional[str] = None  # estado actual
+    end_date_from: Optional[date] = None
+    end_date_to: Optional[date] = None
+
+class PolicyBulkUpdateStatus(BaseModel):
+    filter: PolicyBulkFilter
+    status: str  # estado destino
+
+class PolicyBulkRenew(BaseModel):
+    filter: PolicyBulkFilter
+    months: int = 12  # desplazamiento de start_date y end_date
+
+class PolicyArchiveRequest(BaseModel):
+    # días de retención; None = ARCHIVE_CANCELLED_AFTER_DAYS / ARCHIVE_EXPIRED_AFTER_DAYS
+    cancelled_days: Optional[int] = None
+    expired_days: Optional[int] = None
+
+class JobRead(BaseModel):
+    id: int
+    kind: str
+    status: str  # queued | running | succeeded | failed | cancelled
+    params: dict
+    total: Optional[int] = None
+    processed: int = 0
+    cancel_requested: bool = False
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    class Config:
+        from_attributes = True
+
+# --------------------
+# EVENTS (outbox, GET /events)
+# --------------------
+class PolicyEventRead(BaseModel):
+    seq: int
+    policy_id: int
+    entity: str  # policy | coverage | beneficiary
+    entity_id: int
+    op: str  # created | updated | cancelled | deleted | archived
+    data: Optional[dict] = None  # estado tras el cambio (forma del *Read); null en deleted/archived
+    created_at: datetime
+    class Config:
+        from_attributes = True
+
+class PolicyEventPage(BaseModel):
+    events: List[PolicyEventRead] = []
+    next_after: int  # valor de after para la siguiente llamada
+
 # --- resolver forward-refs (Pydantic v2)
 PolicyCreate.model_rebuild()
 PolicyRead.model_rebuild()
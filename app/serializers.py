@@ -0,0 +1,69 @@
+# app/serializers.py
+import operator
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+import orjson
+from fastapi.responses import Response
+
+from . import schemas
+
+# Mismo JSON que produce FastAPI con response_model (Pydantic v2): Decimal como string,
+# datetimes UTC con sufijo "Z", compacto y sin escapar UTF-8.
+_ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+def _default(obj: Any):
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+
+
+class JSONBytesResponse(Response):
+    """Respuesta JSON vía orjson (para contenido ya construido por un ModelSerializer)."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class ModelSerializer:
+    """Convierte objetos ORM en dicts con la forma exacta de un schema *Read, sin validación Pydantic.
+
+    Los campos (y su orden) se precalculan una vez desde el schema; los objetos vienen de la base,
+    así que ya cumplen los tipos declarados.
+    """
+
+    def __init__(self, schema, nested: Optional[Dict[str, "ModelSerializer"]] = None):
+        self.fields: List[str] = list(schema.model_fields)
+        self.nested = nested or {}
+        self._getter = operator.attrgetter(*self.fields)
+
+    def to_dict(self, obj: Any) -> Dict[str, Any]:
+        state = obj.__dict__
+        try:
+            # atajo: atributos ya cargados, sin pasar por los descriptores del ORM
+            data = {f: state[f] for f in self.fields}
+        except KeyError:
+            data = dict(zip(self.fields, self._getter(obj)))  # atributo expirado/diferido: carga normal
+        for name, serializer in self.nested.items():
+            data[name] = serializer.to_list(data[name])
+        return data
+
+    def to_list(self, objs: Iterable[Any]) -> List[Dict[str, Any]]:
+        return [self.to_dict(o) for o in objs]
+
+
+coverage_serializer = ModelSerializer(schemas.PolicyCoverageRead)
+beneficiary_serializer = ModelSerializer(schemas.BeneficiaryRead)
+policy_serializer = ModelSerializer(
+    schemas.PolicyRead,
+    nested={"coverages": coverage_serializer, "beneficiaries": beneficiary_serializer},
+)
+product_serializer = ModelSerializer(schemas.ProductRead)
+event_serializer = ModelSerializer(schemas.PolicyEventRead)
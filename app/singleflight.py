@@ -0,0 +1,55 @@
+# app/singleflight.py
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from fastapi import HTTPException
+
+from .metrics import SINGLEFLIGHT_REQUESTS, SINGLEFLIGHT_TIMEOUTS
+
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+SINGLEFLIGHT_TIMEOUT = float(os.getenv("SINGLEFLIGHT_TIMEOUT", "10"))  # espera máx. de cada petición (s)
+
+
+class SingleFlight:
+    """Agrupa lecturas idénticas concurrentes de un worker en una sola llamada en vuelo.
+
+    La primera petición con una clave (líder) lanza ``fn`` como tarea propia; las que llegan
+    mientras sigue en curso esperan esa misma tarea y reciben el mismo resultado o la misma
+    excepción (p. ej. el 404). El resultado se comparte entre peticiones: debe ser inmutable
+    (bytes, tuplas). La clave la construye quien llama y debe incluir todo lo que cambia el
+    resultado (ids, parámetros, destino de lectura).
+    """
+
+    def __init__(self, name: str, timeout: float = SINGLEFLIGHT_TIMEOUT, enabled: bool = SINGLEFLIGHT_ENABLED):
+        self.name = name
+        self.timeout = timeout
+        self.enabled = enabled
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+
+    def _done(self, key: Hashable, flight: asyncio.Future):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            flight.exception()  # marca la excepción como leída aunque todos hayan dejado de esperar
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.enabled:
+            return await fn()
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(fn())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda f: self._done(key, f))
+            SINGLEFLIGHT_REQUESTS.inc(self.name, "leader")
+        else:
+            SINGLEFLIGHT_REQUESTS.inc(self.name, "coalesced")
+        try:
+            # shield: que una petición se cancele o agote su espera no cancela la llamada compartida
+            return await asyncio.wait_for(asyncio.shield(flight), self.timeout)
+        except asyncio.TimeoutError:
+            SINGLEFLIGHT_TIMEOUTS.inc(self.name)
+            raise HTTPException(status_code=504, detail="Timed out waiting for the database")
+
+    def in_flight(self) -> int:
+        return len(self._flights)
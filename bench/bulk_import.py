@@ -0,0 +1,87 @@
+# bench/bulk_import.py
+"""
+Compara el alta de pólizas una a una (POST /policies) contra el alta masiva (POST /policies:bulk).
+
+Uso (API levantada contra una base local y un producto existente):
+    python -m bench.bulk_import --base-url http://localhost:8000 --product PRD001 --count 5000
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+
+
+def make_policies(count: int, product: str, prefix: str):
+    return [
+        {
+            "policy_number": f"{prefix}-{i:08d}",
+            "customer_id": 1000 + i % 500,
+            "product_id": product,
+            "agent_id": f"AGT{i % 50:03d}",
+            "start_date": "2025-01-01",
+            "end_date": "2026-01-01",
+            "sum_insured": 50000,
+            "premium": 500,
+            "status": "ACTIVE",
+            "coverages": [
+                {"coverage_code": "COV01", "coverage_name": "Cobertura A", "coverage_limit": 10000, "deductible": 500},
+                {"coverage_code": "COV02", "coverage_name": "Cobertura B", "coverage_limit": 5000, "deductible": 250},
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+async def run_single(client: httpx.AsyncClient, policies, concurrency: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(p):
+        async with sem:
+            r = await client.post("/policies/", json=p)
+            r.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(p) for p in policies))
+    return time.perf_counter() - start
+
+
+async def run_bulk(client: httpx.AsyncClient, policies, ndjson: bool) -> float:
+    start = time.perf_counter()
+    if ndjson:
+        body = "".join(json.dumps(p) + "\n" for p in policies)
+        r = await client.post("/policies:bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+    else:
+        r = await client.post("/policies:bulk", json=policies)
+    r.raise_for_status()
+    elapsed = time.perf_counter() - start
+    report = r.json()
+    if report["failed"]:
+        raise SystemExit(f"bulk import reported {report['failed']} failed rows")
+    return elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--product", required=True, help="product.code existente")
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16, help="peticiones simultáneas en la ruta individual")
+    parser.add_argument("--ndjson", action="store_true", help="enviar el lote como NDJSON en vez de array JSON")
+    args = parser.parse_args()
+
+    run_id = uuid.uuid4().hex[:8]
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=600) as client:
+        single = await run_single(client, make_policies(args.count, args.product, f"BENCH-S-{run_id}"), args.concurrency)
+        bulk = await run_bulk(client, make_policies(args.count, args.product, f"BENCH-B-{run_id}"), args.ndjson)
+
+    print(f"{'path':<22}{'rows':>8}{'seconds':>10}{'rows/s':>12}")
+    print(f"{'POST /policies':<22}{args.count:>8}{single:>10.2f}{args.count / single:>12.0f}")
+    print(f"{'POST /policies:bulk':<22}{args.count:>8}{bulk:>10.2f}{args.count / bulk:>12.0f}")
+    print(f"speedup: x{single / bulk:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
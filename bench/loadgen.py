@@ -0,0 +1,84 @@
+# bench/loadgen.py
+"""Generador de carga async (httpx) compartido por los benchmarks."""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(p / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float, statements: Optional[List[int]] = None) -> Dict[str, float]:
+    lat = sorted(latencies)
+    result = {
+        "requests": len(lat),
+        "errors": errors,
+        "rps": len(lat) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(lat, 50) * 1000,
+        "p95_ms": percentile(lat, 95) * 1000,
+        "p99_ms": percentile(lat, 99) * 1000,
+    }
+    if statements:
+        # requiere la API con EXPOSE_DB_TIMING=true (cabecera X-DB-Statements)
+        result["sql_per_request"] = sum(statements) / len(statements)
+    return result
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    make_request: Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]],
+    concurrency: int,
+    duration: Optional[float] = None,
+    total: Optional[int] = None,
+) -> Dict[str, float]:
+    """Lanza `concurrency` bucles que llaman make_request(client, n) con n = 0, 1, 2...
+
+    Termina a los `duration` segundos o tras `total` peticiones (lo que ocurra antes).
+    """
+    latencies: List[float] = []
+    statements: List[int] = []
+    errors = 0
+    deadline = time.perf_counter() + duration if duration else float("inf")
+    counter = 0
+
+    async def worker():
+        nonlocal errors, counter
+        while time.perf_counter() < deadline and (total is None or counter < total):
+            n = counter
+            counter += 1
+            start = time.perf_counter()
+            try:
+                r = await make_request(client, n)
+                ok = r.status_code < 500
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+                if "x-db-statements" in r.headers:
+                    statements.append(int(r.headers["x-db-statements"]))
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start, statements)
+
+
+async def wait_until_up(base_url: str, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=base_url, timeout=2) as client:
+        while True:
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.perf_counter() > deadline:
+                raise SystemExit(f"API no disponible en {base_url}")
+            await asyncio.sleep(0.5)
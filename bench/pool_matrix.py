@@ -0,0 +1,85 @@
+# bench/pool_matrix.py
+"""
+Throughput y latencia de la API para distintas combinaciones de workers de gunicorn y tamaño de pool.
+
+Levanta gunicorn (UvicornWorker) por cada combinación contra DATABASE_URL (Postgres local con datos),
+aplica carga concurrente sobre GET /policies y GET /policies/{id} y muestra rps y p50/p95/p99.
+
+Uso:
+    DATABASE_URL=postgresql+asyncpg://... python -m bench.pool_matrix --workers 1,2,4 --pool-sizes 2,5,10 \\
+        --max-overflow 0 --concurrency 64 --duration 20
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+
+import httpx
+
+from .loadgen import run_load, wait_until_up
+
+
+async def _pick_policy_ids(client: httpx.AsyncClient):
+    r = await client.get("/policies/", params={"limit": 200, "include": ""})
+    r.raise_for_status()
+    ids = [p["id"] for p in r.json()]
+    if not ids:
+        raise SystemExit("la base no tiene pólizas: sembrar datos primero")
+    return ids
+
+
+async def _measure(base_url: str, concurrency: int, duration: float):
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=httpx.Limits(max_connections=concurrency)) as client:
+        ids = await _pick_policy_ids(client)
+
+        async def mixed(c: httpx.AsyncClient, n: int):
+            if n % 4 == 0:
+                return await c.get("/policies/", params={"limit": 50})
+            return await c.get(f"/policies/{ids[n % len(ids)]}")
+
+        return await run_load(client, mixed, concurrency, duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--pool-sizes", default="2,5,10")
+    parser.add_argument("--max-overflow", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pgbouncer", action="store_true", help="DB_PGBOUNCER=1 (sin caché de prepared statements)")
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        raise SystemExit("DATABASE_URL no definido")
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    print(f"{'workers':>8}{'pool':>6}{'overflow':>10}{'max_conns':>11}{'rps':>10}{'p50_ms':>9}{'p95_ms':>9}{'p99_ms':>9}{'errors':>8}")
+    for workers in [int(w) for w in args.workers.split(",")]:
+        for pool_size in [int(p) for p in args.pool_sizes.split(",")]:
+            env = dict(
+                os.environ,
+                DB_POOL_SIZE=str(pool_size),
+                DB_MAX_OVERFLOW=str(args.max_overflow),
+                DB_PGBOUNCER="1" if args.pgbouncer else "0",
+            )
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "gunicorn", "-k", "uvicorn.workers.UvicornWorker", "app.main:app",
+                 "--workers", str(workers), "--bind", f"127.0.0.1:{args.port}", "--log-level", "warning"],
+                env=env,
+            )
+            try:
+                asyncio.run(wait_until_up(base_url))
+                r = asyncio.run(_measure(base_url, args.concurrency, args.duration))
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+            max_conns = workers * (pool_size + args.max_overflow)
+            print(f"{workers:>8}{pool_size:>6}{args.max_overflow:>10}{max_conns:>11}{r['rps']:>10.0f}"
+                  f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+# bench/run.py
+"""
+Benchmark de regresión: recorre todos los endpoints de app/routers/ con carga concurrente.
+
+Para cada escenario reporta rps, p50/p95/p99 y sentencias SQL por petición, guarda el resultado
+en JSON y, si se pasa --baseline, marca regresiones por encima de --threshold (código de salida 1).
+Las mutaciones deben emitir exactamente EXPECTED_STATEMENTS sentencias por petición (código de salida 1 si no).
+
+Requisitos: base sembrada (python -m bench.seed) y la API levantada con EXPOSE_DB_TIMING=true
+(sin esa variable no hay columna sql/req).
+
+Uso:
+    python -m bench.run --base-url http://localhost:8000 --requests 500 --concurrency 32 --out bench/results/current.json
+    python -m bench.run ... --baseline bench/results/baseline.json --threshold 0.15
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+import uuid
+from datetime import date, datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from .loadgen import run_load, wait_until_up
+
+RequestFn = Callable[[httpx.AsyncClient, int, Dict[str, Any]], Awaitable[httpx.Response]]
+
+
+class Scenario:
+    def __init__(self, name: str, request: RequestFn, setup: Optional[Callable[..., Awaitable[Dict[str, Any]]]] = None):
+        self.name = name
+        self.request = request
+        self.setup = setup  # prepara recursos propios (p. ej. filas a borrar); recibe (client, ctx, total)
+
+
+def _policy_body(number: str, product: str, coverages: int = 2, customer_id: int = 1, **overrides) -> Dict[str, Any]:
+    return {
+        "policy_number": number,
+        "customer_id": customer_id,
+        "product_id": product,
+        "agent_id": "AGT000",
+        "start_date": "2025-01-01",
+        "end_date": "2026-01-01",
+        "sum_insured": 50000,
+        "premium": 500,
+        "status": "ACTIVE",
+        "coverages": [
+            {"coverage_code": f"COV{j:02d}", "coverage_name": f"Cobertura {j}", "coverage_limit": 10000, "deductible": 500}
+            for j in range(coverages)
+        ],
+        **overrides,
+    }
+
+
+def _coverage_body(n: int) -> Dict[str, Any]:
+    return {"coverage_code": f"BCOV{n}", "coverage_name": "Bench", "coverage_limit": 1000, "deductible": 10}
+
+
+def _beneficiary_body(n: int) -> Dict[str, Any]:
+    return {"client_id": n, "full_name": f"Bench {n}", "relationship": "hijo", "percentage": 10}
+
+
+JOB_FINISHED = ("succeeded", "failed", "cancelled")
+JOB_POLL_INTERVAL = 0.05  # segundos entre consultas a GET /jobs/{id}
+JOB_POLICIES = 200  # pólizas del cliente propio del benchmark sobre las que corren los jobs
+
+
+async def _wait_job(client: httpx.AsyncClient, job_id: int, expect: Tuple[str, ...] = ("succeeded",)) -> httpx.Response:
+    """Consulta GET /jobs/{id} hasta que el job termina; un estado final no esperado cuenta como error."""
+    while True:
+        r = await client.get(f"/jobs/{job_id}")
+        r.raise_for_status()
+        job = r.json()
+        if job["status"] in JOB_FINISHED:
+            if job["status"] not in expect:
+                raise httpx.HTTPError(f"job {job_id} {job['status']}: {job.get('error')}")
+            return r
+        await asyncio.sleep(JOB_POLL_INTERVAL)
+
+
+async def _run_job(client: httpx.AsyncClient, path: str, body: Dict[str, Any]) -> httpx.Response:
+    # latencia = alta + todos los lotes; sql/req = sentencias de la petición de alta (los lotes van en la tarea del job)
+    r = await client.post(path, json=body)
+    r.raise_for_status()
+    await _wait_job(client, r.json()["id"])
+    return r
+
+
+async def _cancel_job(client: httpx.AsyncClient, body: Dict[str, Any]) -> httpx.Response:
+    r = await client.post("/policies:bulkUpdateStatus", json=body)
+    r.raise_for_status()
+    job_id = r.json()["id"]
+    cancel = await client.post(f"/jobs/{job_id}:cancel")
+    if cancel.status_code not in (200, 409):  # 409: terminó antes de llegar la cancelación
+        cancel.raise_for_status()
+    await _wait_job(client, job_id, expect=("cancelled", "succeeded"))
+    return cancel
+
+
+def _pick(items: List[Any], n: int):
+    return items[n % len(items)]
+
+
+async def _create_many(client: httpx.AsyncClient, count: int, path_fn, body_fn) -> List[int]:
+    sem = asyncio.Semaphore(16)
+
+    async def one(i):
+        async with sem:
+            r = await client.post(path_fn(i), json=body_fn(i))
+            r.raise_for_status()
+            return r.json()["id"]
+
+    return list(await asyncio.gather(*(one(i) for i in range(count))))
+
+
+# --------------------
+# Contexto común (ids existentes en la base sembrada)
+# --------------------
+async def build_context(client: httpx.AsyncClient, tag: str) -> Dict[str, Any]:
+    products = (await client.get("/products/")).json()
+    if not products:
+        raise SystemExit("no hay productos: ejecutar python -m bench.seed primero")
+    r = await client.get("/policies/", params={"limit": 500, "include": ""})
+    policies = r.json()
+    if not policies:
+        raise SystemExit("no hay pólizas: ejecutar python -m bench.seed primero")
+    second_page = await client.get("/policies/", params={"limit": 100, "include": ""})
+    ctx = {
+        "tag": tag,
+        "product_ids": [p["id"] for p in products],
+        "product_code": products[0]["code"],
+        "policy_ids": [p["id"] for p in policies],
+        "policy_numbers": [p["policy_number"] for p in policies],
+        "customer_ids": sorted({p["customer_id"] for p in policies}),
+        "cursor": second_page.headers.get("x-next-cursor"),
+    }
+    # póliza propia del benchmark para las mutaciones de hijos
+    r = await client.post("/policies/", json=_policy_body(f"BENCH-{tag}-OWN", ctx["product_code"]))
+    r.raise_for_status()
+    ctx["own_policy_id"] = r.json()["id"]
+    pid = ctx["own_policy_id"]
+    ctx["coverage_ids"] = await _create_many(client, 20, lambda i: f"/policies/{pid}/coverages", _coverage_body)
+    ctx["beneficiary_ids"] = await _create_many(client, 20, lambda i: f"/policies/{pid}/beneficiaries", _beneficiary_body)
+    return ctx
+
+
+async def _setup_products(client, ctx, total):
+    ids = await _create_many(client, total, lambda i: "/products/", lambda i: {
+        "code": f"BD-{ctx['tag']}-{i}", "name": "Bench delete", "base_premium": 1})
+    return {"ids": ids}
+
+
+async def _setup_coverages(client, ctx, total):
+    pid = ctx["own_policy_id"]
+    return {"ids": await _create_many(client, total, lambda i: f"/policies/{pid}/coverages", _coverage_body)}
+
+
+async def _setup_beneficiaries(client, ctx, total):
+    pid = ctx["own_policy_id"]
+    return {"ids": await _create_many(client, total, lambda i: f"/policies/{pid}/beneficiaries", _beneficiary_body)}
+
+
+async def _setup_job_policies(client, ctx, total):
+    # cliente propio (derivado del tag) para que los jobs solo toquen pólizas del benchmark; una vez por run
+    if "job_customer_id" not in ctx:
+        customer_id = 1_000_000_000 + int(ctx["tag"][:6], 16)
+        for start in range(0, JOB_POLICIES, 100):
+            r = await client.post("/policies:bulk", json=[
+                _policy_body(f"BENCH-{ctx['tag']}-J{i}", ctx["product_code"], customer_id=customer_id)
+                for i in range(start, min(start + 100, JOB_POLICIES))])
+            r.raise_for_status()
+        ctx["job_customer_id"] = customer_id
+    return {"job_customer_id": ctx["job_customer_id"]}
+
+
+async def _setup_job(client, ctx, total):
+    state = await _setup_job_policies(client, ctx, total)
+    r = await client.post("/policies:bulkUpdateStatus", json={
+        "filter": {"customer_id": state["job_customer_id"]}, "status": "ACTIVE"})
+    r.raise_for_status()
+    await _wait_job(client, r.json()["id"])
+    return {**state, "job_id": r.json()["id"]}
+
+
+ARCHIVE_POLICIES_PER_REQUEST = 5
+# pólizas CANCELLED vencidas antes de ARCHIVE_EXPIRED_BEFORE: solo las del benchmark caen en la ventana
+ARCHIVE_EXPIRED_BEFORE = date(2000, 1, 1)
+
+
+def _archive_body() -> Dict[str, Any]:
+    # cancelled_days enorme: ninguna cancelada por antigüedad; expired_days corta justo en ARCHIVE_EXPIRED_BEFORE
+    return {"cancelled_days": 36500, "expired_days": (date.today() - ARCHIVE_EXPIRED_BEFORE).days}
+
+
+async def _create_archivable(client, ctx, prefix: str, count: int) -> List[int]:
+    ids = []
+    for start in range(0, count, 100):
+        r = await client.post("/policies:bulk", json=[
+            _policy_body(f"BENCH-{ctx['tag']}-{prefix}{i}", ctx["product_code"], status="CANCELLED",
+                         start_date="1999-01-01", end_date="1999-12-31")
+            for i in range(start, min(start + 100, count))])
+        r.raise_for_status()
+        ids += [item["id"] for item in r.json()["results"] if item["status"] == "created"]
+    return ids
+
+
+async def _setup_archive(client, ctx, total):
+    # los jobs concurrentes reparten estas pólizas entre sí (el archivado no admite filtro)
+    await _create_archivable(client, ctx, "A", total * ARCHIVE_POLICIES_PER_REQUEST)
+    return {}
+
+
+async def _setup_archived(client, ctx, total):
+    ids = await _create_archivable(client, ctx, "R", 100)
+    await _run_job(client, "/policies:archive", _archive_body())
+    return {"archived_ids": ids}
+
+
+async def _setup_etags(client, ctx, total):
+    ids = ctx["policy_ids"][:200]
+    etags = [(await client.get(f"/policies/{pid}")).headers["etag"] for pid in ids]
+    return {"etags": list(zip(ids, etags))}
+
+
+def scenarios() -> List[Scenario]:
+    return [
+        # products
+        Scenario("GET /products/", lambda c, n, x: c.get("/products/")),
+        Scenario("GET /products/{id}", lambda c, n, x: c.get(f"/products/{_pick(x['product_ids'], n)}")),
+        Scenario("POST /products/", lambda c, n, x: c.post("/products/", json={
+            "code": f"BP-{x['tag']}-{n}", "name": "Bench", "base_premium": 1})),
+        Scenario("PATCH /products/{id}", lambda c, n, x: c.patch(f"/products/{x['ids'][0]}", json={"name": f"Bench {n}"}),
+                 setup=lambda c, x, t: _setup_products(c, x, 1)),
+        Scenario("DELETE /products/{id}", lambda c, n, x: c.delete(f"/products/{x['ids'][n]}"), setup=_setup_products),
+        # policies
+        Scenario("GET /policies/", lambda c, n, x: c.get("/policies/", params={"limit": 100})),
+        Scenario("GET /policies/ include=all", lambda c, n, x: c.get("/policies/", params={
+            "limit": 100, "include": "coverages,beneficiaries"})),
+        Scenario("GET /policies/ fields", lambda c, n, x: c.get("/policies/", params={
+            "limit": 100, "fields": "policy_number,status,premium,coverages.coverage_code"})),
+        Scenario("GET /policies/ limit=1000", lambda c, n, x: c.get("/policies/", params={"limit": 1000})),
+        Scenario("GET /policies/ cursor", lambda c, n, x: c.get("/policies/", params={"limit": 100, "cursor": x["cursor"]})),
+        Scenario("GET /policies/ customerId", lambda c, n, x: c.get("/policies/", params={"customerId": _pick(x["customer_ids"], n)})),
+        Scenario("GET /policies/export", lambda c, n, x: c.get("/policies/export", params={"customerId": _pick(x["customer_ids"], n)})),
+        Scenario("GET /policies/search", lambda c, n, x: c.get("/policies/search", params={
+            "q": _pick(x["policy_numbers"], n)[:-2], "include": ""})),
+        Scenario("GET /policies/stats", lambda c, n, x: c.get("/policies/stats")),
+        Scenario("GET /policies/stats product_id", lambda c, n, x: c.get("/policies/stats", params={
+            "groupBy": "product_id", "startDateFrom": "2024-01-01"})),
+        Scenario("GET /policies/expiring", lambda c, n, x: c.get("/policies/expiring", params={"within_days": 30, "limit": 100})),
+        Scenario("GET /events", lambda c, n, x: c.get("/events", params={"limit": 1000})),
+        Scenario("GET /policies/{policy_id}", lambda c, n, x: c.get(f"/policies/{_pick(x['policy_ids'], n)}")),
+        Scenario("GET /policies/{policy_id} fields", lambda c, n, x: c.get(f"/policies/{_pick(x['policy_ids'], n)}", params={
+            "fields": "policy_number,status,premium"})),
+        Scenario("GET /policies/{policy_id} hot", lambda c, n, x: c.get(f"/policies/{x['policy_ids'][0]}")),
+        Scenario("GET /policies/{policy_id} If-None-Match", lambda c, n, x: c.get(
+            f"/policies/{_pick(x['etags'], n)[0]}", headers={"If-None-Match": _pick(x["etags"], n)[1]}), setup=_setup_etags),
+        Scenario("POST /policies:batchGet x100", lambda c, n, x: c.post("/policies:batchGet", json={
+            "ids": [_pick(x["policy_ids"], n + i) for i in range(100)]})),
+        Scenario("POST /policies/", lambda c, n, x: c.post("/policies/", json=_policy_body(f"BENCH-{x['tag']}-S{n}", x["product_code"]))),
+        Scenario("POST /policies:bulk x100", lambda c, n, x: c.post("/policies:bulk", json=[
+            _policy_body(f"BENCH-{x['tag']}-B{n}-{i}", x["product_code"]) for i in range(100)])),
+        Scenario("PATCH /policies/{policy_id}", lambda c, n, x: c.patch(f"/policies/{x['own_policy_id']}", json={"premium": n % 1000})),
+        Scenario("DELETE /policies/{policy_id}", lambda c, n, x: c.delete(f"/policies/{x['own_policy_id']}")),
+        Scenario("GET /policies/{policy_id} include_archived", lambda c, n, x: c.get(
+            f"/policies/{_pick(x['archived_ids'], n)}", params={"include_archived": "true"}), setup=_setup_archived),
+        Scenario("POST /policies:archive", lambda c, n, x: _run_job(c, "/policies:archive", _archive_body()),
+                 setup=_setup_archive),
+        # jobs (sobre JOB_POLICIES pólizas del cliente propio; cada petición espera a que el job termine)
+        Scenario("POST /policies:bulkUpdateStatus", lambda c, n, x: _run_job(c, "/policies:bulkUpdateStatus", {
+            "filter": {"customer_id": x["job_customer_id"]}, "status": "SUSPENDED" if n % 2 else "ACTIVE"}),
+                 setup=_setup_job_policies),
+        Scenario("POST /policies:bulkRenew", lambda c, n, x: _run_job(c, "/policies:bulkRenew", {
+            "filter": {"customer_id": x["job_customer_id"]}, "months": 12}), setup=_setup_job_policies),
+        Scenario("GET /jobs/{job_id}", lambda c, n, x: c.get(f"/jobs/{x['job_id']}"), setup=_setup_job),
+        Scenario("POST /jobs/{job_id}:cancel", lambda c, n, x: _cancel_job(c, {
+            "filter": {"customer_id": x["job_customer_id"]}, "status": "SUSPENDED" if n % 2 else "ACTIVE"}),
+                 setup=_setup_job_policies),
+        # coverages
+        Scenario("GET /policies/{policy_id}/coverages", lambda c, n, x: c.get(f"/policies/{_pick(x['policy_ids'], n)}/coverages")),
+        Scenario("GET /policies/{policy_id}/coverages/{coverage_id}", lambda c, n, x: c.get(
+            f"/policies/{x['own_policy_id']}/coverages/{_pick(x['coverage_ids'], n)}")),
+        Scenario("POST /policies/{policy_id}/coverages", lambda c, n, x: c.post(
+            f"/policies/{x['own_policy_id']}/coverages", json=_coverage_body(n))),
+        Scenario("PATCH /policies/{policy_id}/coverages/{coverage_id}", lambda c, n, x: c.patch(
+            f"/policies/{x['own_policy_id']}/coverages/{_pick(x['coverage_ids'], n)}", json={"deductible": n % 100})),
+        Scenario("DELETE /policies/{policy_id}/coverages/{coverage_id}", lambda c, n, x: c.delete(
+            f"/policies/{x['own_policy_id']}/coverages/{x['ids'][n]}"), setup=_setup_coverages),
+        # beneficiaries
+        Scenario("GET /policies/{policy_id}/beneficiaries", lambda c, n, x: c.get(f"/policies/{_pick(x['policy_ids'], n)}/beneficiaries")),
+        Scenario("GET /policies/{policy_id}/beneficiaries/{beneficiary_id}", lambda c, n, x: c.get(
+            f"/policies/{x['own_policy_id']}/beneficiaries/{_pick(x['beneficiary_ids'], n)}")),
+        Scenario("POST /policies/{policy_id}/beneficiaries", lambda c, n, x: c.post(
+            f"/policies/{x['own_policy_id']}/beneficiaries", json=_beneficiary_body(n))),
+        Scenario("PATCH /policies/{policy_id}/beneficiaries/{beneficiary_id}", lambda c, n, x: c.patch(
+            f"/policies/{x['own_policy_id']}/beneficiaries/{_pick(x['beneficiary_ids'], n)}", json={"percentage": n % 100})),
+        Scenario("DELETE /policies/{policy_id}/beneficiaries/{beneficiary_id}", lambda c, n, x: c.delete(
+            f"/policies/{x['own_policy_id']}/beneficiaries/{x['ids'][n]}"), setup=_setup_beneficiaries),
+    ]
+
+
+# --------------------
+# Sentencias SQL por petición de cada mutación (régimen estable: cachés calientes)
+# --------------------
+# BEGIN/COMMIT no cuentan (asyncpg no pasa por el cursor). "outbox" = INSERT en policy_event + pg_notify.
+EXPECTED_STATEMENTS = {
+    "POST /products/": 2,  # INSERT ... RETURNING + pg_notify
+    "PATCH /products/{id}": 2,  # UPDATE ... RETURNING + pg_notify
+    "DELETE /products/{id}": 2,  # DELETE ... RETURNING + pg_notify
+    "POST /policies/": 5,  # INSERT póliza + policy_summary + INSERT coberturas + outbox (2)
+    "POST /policies:bulk x100": 6,  # SELECT productos + INSERT pólizas + policy_summary + INSERT coberturas + outbox (2)
+    "PATCH /policies/{policy_id}": 6,  # snapshot FOR UPDATE + UPDATE + policy_summary + outbox (2) + coberturas
+    "DELETE /policies/{policy_id}": 4,  # snapshot + UPDATE + outbox (2); ya CANCELLED: sin delta de resumen
+    "POST /policies:bulkUpdateStatus": 1,  # INSERT job (los lotes corren en la tarea del job)
+    "POST /policies:bulkRenew": 1,  # INSERT job
+    "POST /policies:archive": 1,  # INSERT job
+    "POST /policies/{policy_id}/coverages": 4,  # UPDATE versión + INSERT ... RETURNING + outbox (2)
+    "PATCH /policies/{policy_id}/coverages/{coverage_id}": 4,  # UPDATE ... RETURNING + UPDATE versión + outbox (2)
+    "DELETE /policies/{policy_id}/coverages/{coverage_id}": 4,  # DELETE ... RETURNING + UPDATE versión + outbox (2)
+    "POST /policies/{policy_id}/beneficiaries": 4,
+    "PATCH /policies/{policy_id}/beneficiaries/{beneficiary_id}": 4,
+    "DELETE /policies/{policy_id}/beneficiaries/{beneficiary_id}": 4,
+}
+
+
+def check_statements(current: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """(discrepancias, omitidos). Un escenario ejecutado sin medición cuenta como discrepancia."""
+    # media redondeada: la primera petición puede sumar un fallo de caché o un delta de resumen
+    mismatches, skipped = [], []
+    for name, expected in EXPECTED_STATEMENTS.items():
+        cur = current["scenarios"].get(name)
+        if cur is None:
+            skipped.append(name)  # filtrado por --only
+        elif "sql_per_request" not in cur:
+            mismatches.append(f"{name}: sin X-DB-Statements; levantar la API con EXPOSE_DB_TIMING=true")
+        elif round(cur["sql_per_request"]) != expected:
+            mismatches.append(f"{name}: sql/req {cur['sql_per_request']:.2f}, esperado {expected}")
+    return mismatches, skipped
+
+
+# --------------------
+# Comparación con baseline
+# --------------------
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    regressions = []
+    for name, cur in current["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if not base:
+            continue
+        if base["p95_ms"] and cur["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {base['p95_ms']:.1f}ms -> {cur['p95_ms']:.1f}ms")
+        if base["rps"] and cur["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{name}: rps {base['rps']:.0f} -> {cur['rps']:.0f}")
+        if "sql_per_request" in base and "sql_per_request" in cur and cur["sql_per_request"] > base["sql_per_request"] + 0.01:
+            regressions.append(f"{name}: sql/req {base['sql_per_request']:.2f} -> {cur['sql_per_request']:.2f}")
+        if cur["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} -> {cur['errors']}")
+    return regressions
+
+
+async def run(args) -> Dict[str, Any]:
+    await wait_until_up(args.base_url)
+    tag = uuid.uuid4().hex[:8]
+    selected = [s for s in scenarios() if not args.only or any(o in s.name for o in args.only)]
+    results: Dict[str, Any] = {}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=120, limits=limits) as client:
+        ctx = await build_context(client, tag)
+        print(f"{'scenario':<64}{'rps':>9}{'p50_ms':>9}{'p95_ms':>9}{'p99_ms':>9}{'sql/req':>9}{'err':>6}")
+        for scenario in selected:
+            state = dict(ctx)
+            if scenario.setup:
+                state.update(await scenario.setup(client, ctx, args.requests))
+            r = await run_load(client, lambda c, n: scenario.request(c, n, state), args.concurrency, total=args.requests)
+            results[scenario.name] = r
+            sql = f"{r['sql_per_request']:.2f}" if "sql_per_request" in r else "-"
+            print(f"{scenario.name:<64}{r['rps']:>9.0f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{sql:>9}{r['errors']:>6}")
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "base_url": args.base_url,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+        },
+        "scenarios": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=500, help="peticiones por escenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--only", nargs="*", help="ejecutar solo escenarios cuyo nombre contenga alguno de estos textos")
+    parser.add_argument("--out", default=f"bench/results/run-{int(time.time())}.json")
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=0.15, help="tolerancia relativa (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    current = asyncio.run(run(args))
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(current, f, indent=2)
+    print(f"resultados en {args.out}")
+
+    mismatches, skipped = check_statements(current)
+    if skipped:
+        print("sentencias por petición sin comprobar (fuera de --only):")
+        for name in skipped:
+            print(f"  - {name}")
+    if mismatches:
+        print("SENTENCIAS POR PETICIÓN:")
+        for line in mismatches:
+            print(f"  - {line}")
+        sys.exit(1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(current, json.load(f), args.threshold)
+        if regressions:
+            print("REGRESIONES:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("sin regresiones respecto al baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# bench/search.py
+"""
+Benchmark de GET /policies/search sobre una base grande (pensado para millones de filas).
+
+Toma muestras reales de policy_number y Beneficiary.full_name y mide, por tipo de consulta,
+rps y p50/p95/p99 contra la API. Con --explain imprime además el EXPLAIN (ANALYZE, BUFFERS) de la
+consulta de ranking para comprobar que usa los índices trigram (Bitmap Index Scan sobre *_trgm).
+
+Uso:
+    DATABASE_URL=postgresql+asyncpg://... python -m bench.seed --policies 3000000 --truncate
+    DATABASE_URL=postgresql+asyncpg://... python -m bench.search --base-url http://localhost:8000 \\
+        --requests 300 --concurrency 16 [--explain]
+"""
+import argparse
+import asyncio
+import os
+import random
+from typing import Dict, List
+
+import asyncpg
+import httpx
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import asyncpg as pg_asyncpg
+from sqlalchemy.engine import make_url
+
+from .loadgen import run_load, wait_until_up
+
+
+def _dsn() -> str:
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise SystemExit("DATABASE_URL no definido")
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+def _typo(value: str, rnd: random.Random) -> str:
+    i = rnd.randrange(len(value))
+    return value[:i] + rnd.choice("abcdefghijklmnopqrstuvwxyz0123456789") + value[i + 1:]
+
+
+async def sample_queries(conn: asyncpg.Connection, size: int, rnd: random.Random) -> Dict[str, List[dict]]:
+    # TABLESAMPLE: muestra barata sin recorrer la tabla completa
+    numbers = [r[0] for r in await conn.fetch("SELECT policy_number FROM policy TABLESAMPLE SYSTEM (1) LIMIT $1", size)]
+    names = [r[0] for r in await conn.fetch("SELECT full_name FROM beneficiary TABLESAMPLE SYSTEM (1) LIMIT $1", size)]
+    codes = [r[0] for r in await conn.fetch("SELECT DISTINCT coverage_code FROM policy_coverage LIMIT 20")]
+    if not numbers or not names:
+        raise SystemExit("base vacía: ejecutar python -m bench.seed primero")
+    return {
+        "number prefix": [{"q": n[: max(3, len(n) - 3)]} for n in numbers],
+        "number fuzzy": [{"q": _typo(n, rnd)} for n in numbers],
+        "name prefix": [{"q": " ".join(n.split()[:2])} for n in names],
+        "name fuzzy": [{"q": _typo(" ".join(n.split()[:3]), rnd)} for n in names],
+        "number prefix + coverageCode": [{"q": n[: max(3, len(n) - 3)], "coverageCode": rnd.choice(codes)} for n in numbers],
+    }
+
+
+async def explain(conn: asyncpg.Connection, params: dict):
+    # misma consulta de ranking que el handler, con literales para poder pasarla a EXPLAIN
+    from app.routers.policy import _search_hits
+
+    hits = _search_hits(params.get("q"), params.get("coverageCode"))
+    stmt = select(hits.c.policy_id, hits.c.score).order_by(hits.c.score.desc(), hits.c.policy_id).limit(20)
+    sql = str(stmt.compile(dialect=pg_asyncpg.dialect(), compile_kwargs={"literal_binds": True}))
+    for row in await conn.fetch("EXPLAIN (ANALYZE, BUFFERS) " + sql):
+        print("    " + row[0])
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=300, help="peticiones por tipo de consulta")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--explain", action="store_true")
+    parser.add_argument("--random-seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.random_seed)
+    conn = await asyncpg.connect(_dsn())
+    try:
+        policies = await conn.fetchval("SELECT reltuples::bigint FROM pg_class WHERE relname = 'policy'")
+        beneficiaries = await conn.fetchval("SELECT reltuples::bigint FROM pg_class WHERE relname = 'beneficiary'")
+        print(f"~{policies:,} pólizas, ~{beneficiaries:,} beneficiarios")
+        queries = await sample_queries(conn, args.samples, rnd)
+        if args.explain:
+            for kind, params in queries.items():
+                print(f"EXPLAIN {kind}: {params[0]}")
+                await explain(conn, params[0])
+    finally:
+        await conn.close()
+
+    await wait_until_up(args.base_url)
+    print(f"{'consulta':<32}{'rps':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errores':>9}")
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        for kind, params in queries.items():
+            result = await run_load(
+                client,
+                lambda c, n, p=params: c.get("/policies/search", params={**p[n % len(p)], "include": ""}),
+                args.concurrency,
+                total=args.requests,
+            )
+            print(f"{kind:<32}{result['rps']:>8.0f}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+                  f"{result['p99_ms']:>10.1f}{result['errors']:>9}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+# bench/seed.py
+"""
+Siembra una base local con volúmenes configurables para los benchmarks (COPY vía asyncpg).
+
+Uso:
+    DATABASE_URL=postgresql+asyncpg://... python -m bench.seed --products 20 --policies 100000 \\
+        --coverages-per-policy 3 --beneficiaries-per-policy 2 [--truncate]
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+SEED_PREFIX = "SEED"
+STATUSES = ["ACTIVE"] * 8 + ["CANCELLED", "EXPIRED"]
+RELATIONSHIPS = ["hijo", "cónyuge", "padre", "madre"]
+# nombres variados para que la búsqueda aproximada (bench.search) tenga selectividad realista
+FIRST_NAMES = ["Ana", "Luis", "María", "José", "Carmen", "Jorge", "Lucía", "Pedro", "Rosa", "Diego", "Elena", "Andrés",
+               "Sofía", "Miguel", "Valeria", "Carlos", "Julia", "Fernando", "Paula", "Raúl"]
+LAST_NAMES = ["García", "Rodríguez", "Martínez", "López", "González", "Pérez", "Sánchez", "Ramírez", "Torres", "Flores",
+              "Rivera", "Gómez", "Díaz", "Reyes", "Morales", "Castillo", "Ortiz", "Vargas", "Mendoza", "Quispe"]
+CHUNK = 50_000
+
+
+def create_schema():
+    # mismo esquema que la app: migraciones de Alembic hasta head
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config("alembic.ini"), "head")
+
+
+def _dsn() -> str:
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise SystemExit("DATABASE_URL no definido")
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+async def seed(args):
+    rnd = random.Random(args.random_seed)
+    conn = await asyncpg.connect(_dsn())
+    try:
+        if args.truncate:
+            await conn.execute("TRUNCATE beneficiary, policy_coverage, policy, product RESTART IDENTITY CASCADE")
+
+        products = [
+            (f"{SEED_PREFIX}-{args.run_tag}-P{i:03d}", f"Producto {i}", None, rnd.choice(["LIFE", "AUTO", "HOME", "HEALTH"]), Decimal("100.00") + i)
+            for i in range(args.products)
+        ]
+        await conn.copy_records_to_table(
+            "product", records=products, columns=["code", "name", "description", "product_type", "base_premium"]
+        )
+        codes = [p[0] for p in products]
+
+        today = date.today()
+        next_num = 0
+        for start in range(0, args.policies, CHUNK):
+            size = min(CHUNK, args.policies - start)
+            rows = []
+            for _ in range(size):
+                start_date = today - timedelta(days=rnd.randint(0, 1500))
+                rows.append((
+                    f"{SEED_PREFIX}-{args.run_tag}-{next_num:09d}",
+                    rnd.randint(1, max(1, args.policies // 5)),
+                    rnd.choice(codes),
+                    f"AGT{rnd.randint(0, 199):03d}",
+                    start_date,
+                    start_date + timedelta(days=365),
+                    Decimal(rnd.randint(10, 500) * 1000),
+                    Decimal(rnd.randint(100, 5000)),
+                    rnd.choice(STATUSES),
+                ))
+                next_num += 1
+            await conn.copy_records_to_table(
+                "policy", records=rows,
+                columns=["policy_number", "customer_id", "product_id", "agent_id", "start_date", "end_date",
+                         "sum_insured", "premium", "status"],
+            )
+            numbers = [r[0] for r in rows]
+            ids = [r["id"] for r in await conn.fetch("SELECT id FROM policy WHERE policy_number = ANY($1::text[])", numbers)]
+
+            coverages = [
+                (pid, f"COV{j:02d}", f"Cobertura {j}", Decimal(rnd.randint(1, 100) * 1000), Decimal(rnd.randint(0, 20) * 50))
+                for pid in ids for j in range(args.coverages_per_policy)
+            ]
+            if coverages:
+                await conn.copy_records_to_table(
+                    "policy_coverage", records=coverages,
+                    columns=["policy_id", "coverage_code", "coverage_name", "coverage_limit", "deductible"],
+                )
+            beneficiaries = [
+                (pid, rnd.randint(1, 10_000_000),
+                 f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)} {rnd.choice(LAST_NAMES)} {pid}-{j}", rnd.choice(RELATIONSHIPS),
+                 Decimal(100 // max(1, args.beneficiaries_per_policy)), None)
+                for pid in ids for j in range(args.beneficiaries_per_policy)
+            ]
+            if beneficiaries:
+                await conn.copy_records_to_table(
+                    "beneficiary", records=beneficiaries,
+                    columns=["policy_id", "client_id", "full_name", "relationship", "percentage", "contact_info"],
+                )
+            print(f"  {start + size}/{args.policies} pólizas")
+        await conn.execute("ANALYZE")
+    finally:
+        await conn.close()
+
+
+async def rebuild_summary():
+    # COPY no pasa por los handlers: recalcular policy_summary (GET /policies/stats)
+    from app.db import AsyncSessionLocal, engine
+    from app.policy_summary import rebuild
+
+    async with AsyncSessionLocal() as db:
+        await rebuild(db)
+        await db.commit()
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=20)
+    parser.add_argument("--policies", type=int, default=10_000)
+    parser.add_argument("--coverages-per-policy", type=int, default=3)
+    parser.add_argument("--beneficiaries-per-policy", type=int, default=2)
+    parser.add_argument("--truncate", action="store_true", help="vaciar las tablas antes de sembrar")
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--run-tag", default=str(int(time.time())), help="sufijo de policy_number para no colisionar")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    create_schema()
+    asyncio.run(seed(args))
+    asyncio.run(rebuild_summary())
+    print(f"sembrado en {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
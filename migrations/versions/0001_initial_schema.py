@@ -0,0 +1,83 @@
+"""initial schema (tablas tal como las creaba create_all)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+Bases creadas antes por create_all ya tienen estas tablas: if_not_exists las deja intactas,
+así que ``alembic upgrade head`` sirve igual para una base nueva que para una existente.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("code", sa.String(50), nullable=False),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("product_type", sa.String(50)),
+        sa.Column("base_premium", sa.Numeric(12, 2)),
+        sa.UniqueConstraint("code"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_product_id", "product", ["id"], if_not_exists=True)
+
+    op.create_table(
+        "policy",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("policy_number", sa.String(100), nullable=False),
+        sa.Column("customer_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.String(50), sa.ForeignKey("product.code"), nullable=False),
+        sa.Column("agent_id", sa.String(50)),
+        sa.Column("start_date", sa.Date()),
+        sa.Column("end_date", sa.Date()),
+        sa.Column("sum_insured", sa.Numeric(14, 2)),
+        sa.Column("premium", sa.Numeric(12, 2)),
+        sa.Column("status", sa.String(50)),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint("policy_number"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_policy_id", "policy", ["id"], if_not_exists=True)
+
+    op.create_table(
+        "policy_coverage",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("policy_id", sa.Integer(), sa.ForeignKey("policy.id"), nullable=False),
+        sa.Column("coverage_code", sa.String(100)),
+        sa.Column("coverage_name", sa.String(255)),
+        sa.Column("coverage_limit", sa.Numeric(14, 2)),
+        sa.Column("deductible", sa.Numeric(12, 2)),
+        if_not_exists=True,
+    )
+    op.create_index("ix_policy_coverage_id", "policy_coverage", ["id"], if_not_exists=True)
+
+    op.create_table(
+        "beneficiary",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("policy_id", sa.BigInteger(), sa.ForeignKey("policy.id"), nullable=False),
+        sa.Column("client_id", sa.BigInteger(), nullable=False),
+        sa.Column("full_name", sa.String(255), nullable=False),
+        sa.Column("relationship", sa.String(50), nullable=False),
+        sa.Column("percentage", sa.Numeric(5, 2)),
+        sa.Column("contact_info", sa.Text()),
+        if_not_exists=True,
+    )
+    op.create_index("ix_beneficiary_id", "beneficiary", ["id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_table("beneficiary")
+    op.drop_table("policy_coverage")
+    op.drop_table("policy")
+    op.drop_table("product")
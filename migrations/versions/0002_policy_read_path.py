@@ -0,0 +1,69 @@
+"""policy: índices del listado por cursor, version/updated_at (ETag) y policy_summary
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# ORDER BY created_at, id con cada combinación de filtros de GET /policies
+KEYSET_INDEXES = {
+    "ix_policy_created_at_id": ["created_at", "id"],
+    "ix_policy_customer_created_at_id": ["customer_id", "created_at", "id"],
+    "ix_policy_customer_status_created_at_id": ["customer_id", "status", "created_at", "id"],
+    "ix_policy_agent_created_at_id": ["agent_id", "created_at", "id"],
+    "ix_policy_agent_status_created_at_id": ["agent_id", "status", "created_at", "id"],
+    "ix_policy_status_created_at_id": ["status", "created_at", "id"],
+}
+
+
+def upgrade() -> None:
+    for name, columns in KEYSET_INDEXES.items():
+        op.create_index(name, "policy", columns, if_not_exists=True)
+
+    op.add_column("policy", sa.Column("version", sa.Integer(), nullable=False, server_default="1"), if_not_exists=True)
+    op.add_column("policy", sa.Column("updated_at", sa.TIMESTAMP(timezone=True), server_default=sa.func.now()), if_not_exists=True)
+
+    op.create_table(
+        "policy_summary",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("product_id", sa.String(50), nullable=False),
+        sa.Column("status", sa.String(50)),
+        sa.Column("agent_id", sa.String(50)),
+        sa.Column("start_date", sa.Date()),
+        sa.Column("end_date", sa.Date()),
+        sa.Column("policy_count", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("premium_total", sa.Numeric(18, 2), nullable=False, server_default="0"),
+        sa.Column("sum_insured_total", sa.Numeric(20, 2), nullable=False, server_default="0"),
+        if_not_exists=True,
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_policy_summary_key ON policy_summary "
+        "(product_id, coalesce(status, ''), coalesce(agent_id, ''), "
+        "coalesce(start_date, '-infinity'::date), coalesce(end_date, '-infinity'::date))"
+    )
+    # carga inicial (misma agregación que app.policy_summary.rebuild), solo si está vacía
+    op.execute(
+        "INSERT INTO policy_summary (product_id, status, agent_id, start_date, end_date, "
+        "policy_count, premium_total, sum_insured_total) "
+        "SELECT product_id, nullif(status, ''), nullif(agent_id, ''), start_date, end_date, "
+        "count(*), coalesce(sum(premium), 0), coalesce(sum(sum_insured), 0) "
+        "FROM policy WHERE NOT EXISTS (SELECT 1 FROM policy_summary) "
+        "GROUP BY 1, 2, 3, 4, 5"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("policy_summary")
+    op.drop_column("policy", "updated_at")
+    op.drop_column("policy", "version")
+    for name in KEYSET_INDEXES:
+        op.drop_index(name, table_name="policy")
@@ -0,0 +1,33 @@
+"""búsqueda: pg_trgm e índices GIN de policy_number / full_name, índice de coverage_code
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_policy_policy_number_trgm", "policy", ["policy_number"],
+        postgresql_using="gin", postgresql_ops={"policy_number": "gin_trgm_ops"}, if_not_exists=True,
+    )
+    op.create_index(
+        "ix_beneficiary_full_name_trgm", "beneficiary", ["full_name"],
+        postgresql_using="gin", postgresql_ops={"full_name": "gin_trgm_ops"}, if_not_exists=True,
+    )
+    op.create_index("ix_policy_coverage_code_policy_id", "policy_coverage", ["coverage_code", "policy_id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_policy_coverage_code_policy_id", table_name="policy_coverage")
+    op.drop_index("ix_beneficiary_full_name_trgm", table_name="beneficiary")
+    op.drop_index("ix_policy_policy_number_trgm", table_name="policy")
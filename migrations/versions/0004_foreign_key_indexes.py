@@ -0,0 +1,36 @@
+"""índices de las claves foráneas (policy_coverage.policy_id, beneficiary.policy_id, policy.product_id)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+Sin ellos, cada carga de coberturas/beneficiarios de una póliza es un seq scan, y borrar una
+póliza o un producto recorre la tabla hija entera para validar la FK. Se crean CONCURRENTLY
+(fuera de transacción) para no bloquear escrituras en tablas grandes.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FK_INDEXES = [
+    ("ix_policy_coverage_policy_id", "policy_coverage", "policy_id"),
+    ("ix_beneficiary_policy_id", "beneficiary", "policy_id"),
+    ("ix_policy_product_id", "policy", "product_id"),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, column in FK_INDEXES:
+            op.create_index(name, table, [column], postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in FK_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
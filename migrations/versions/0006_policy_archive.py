@@ -0,0 +1,79 @@
+"""archivo de pólizas: policy_archive (particionada por rango de created_at) y archivos de hijas
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ARCHIVE_INDEXES = {
+    "ix_policy_archive_created_at_id": ["created_at", "id"],
+    "ix_policy_archive_customer_created_at_id": ["customer_id", "created_at", "id"],
+    "ix_policy_archive_agent_created_at_id": ["agent_id", "created_at", "id"],
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "policy_archive",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("policy_number", sa.String(100), nullable=False),
+        sa.Column("customer_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.String(50), nullable=False),
+        sa.Column("agent_id", sa.String(50)),
+        sa.Column("start_date", sa.Date()),
+        sa.Column("end_date", sa.Date()),
+        sa.Column("sum_insured", sa.Numeric(14, 2)),
+        sa.Column("premium", sa.Numeric(12, 2)),
+        sa.Column("status", sa.String(50)),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.TIMESTAMP(timezone=True)),
+        sa.Column("archived_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("id", "created_at"),
+        postgresql_partition_by="RANGE (created_at)",
+        if_not_exists=True,
+    )
+    # las particiones anuales las crea el job de archivado (app/policy_archive.py) según hagan falta
+    op.execute("CREATE TABLE IF NOT EXISTS policy_archive_default PARTITION OF policy_archive DEFAULT")
+    for name, columns in ARCHIVE_INDEXES.items():
+        op.create_index(name, "policy_archive", columns, if_not_exists=True)
+
+    op.create_table(
+        "policy_coverage_archive",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("policy_id", sa.Integer(), nullable=False),
+        sa.Column("coverage_code", sa.String(100)),
+        sa.Column("coverage_name", sa.String(255)),
+        sa.Column("coverage_limit", sa.Numeric(14, 2)),
+        sa.Column("deductible", sa.Numeric(12, 2)),
+        if_not_exists=True,
+    )
+    op.create_index("ix_policy_coverage_archive_policy_id", "policy_coverage_archive", ["policy_id"], if_not_exists=True)
+
+    op.create_table(
+        "beneficiary_archive",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=False),
+        sa.Column("policy_id", sa.BigInteger(), nullable=False),
+        sa.Column("client_id", sa.BigInteger(), nullable=False),
+        sa.Column("full_name", sa.String(255), nullable=False),
+        sa.Column("relationship", sa.String(50), nullable=False),
+        sa.Column("percentage", sa.Numeric(5, 2)),
+        sa.Column("contact_info", sa.Text()),
+        if_not_exists=True,
+    )
+    op.create_index("ix_beneficiary_archive_policy_id", "beneficiary_archive", ["policy_id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_table("beneficiary_archive")
+    op.drop_table("policy_coverage_archive")
+    op.drop_table("policy_archive")  # arrastra sus particiones
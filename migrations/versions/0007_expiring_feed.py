@@ -0,0 +1,38 @@
+"""índices parciales de GET /policies/expiring (pólizas activas por end_date y por updated_at)
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+
+Solo contienen las filas con status = 'ACTIVE', así que su tamaño es el de la cartera viva y no el
+de la tabla. Se crean CONCURRENTLY (fuera de transacción) para no bloquear escrituras.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE_INDEXES = {
+    "ix_policy_active_end_date_id": ["end_date", "id"],
+    "ix_policy_active_updated_at_id": ["updated_at", "id"],
+}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, columns in ACTIVE_INDEXES.items():
+            op.create_index(
+                name, "policy", columns,
+                postgresql_where=sa.text("status = 'ACTIVE'"), postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in ACTIVE_INDEXES:
+            op.drop_index(name, table_name="policy", postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,37 @@
+"""policy_event: outbox de cambios de pólizas, coberturas y beneficiarios (GET /events)
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "policy_event",
+        sa.Column("seq", sa.BigInteger(), primary_key=True),
+        sa.Column("txid", sa.BigInteger(), nullable=False, server_default=sa.text("txid_current()")),
+        sa.Column("policy_id", sa.BigInteger(), nullable=False),
+        sa.Column("entity", sa.String(20), nullable=False),
+        sa.Column("entity_id", sa.BigInteger(), nullable=False),
+        sa.Column("op", sa.String(20), nullable=False),
+        sa.Column("data", postgresql.JSONB()),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.func.now()),
+        if_not_exists=True,
+    )
+    op.create_index("ix_policy_event_txid_seq", "policy_event", ["txid", "seq"], if_not_exists=True)
+    op.create_index("ix_policy_event_created_at", "policy_event", ["created_at"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_table("policy_event")
@@ -0,0 +1,57 @@
+"""policy_summary: agrupa start_date/end_date por mes (start_month/end_month)
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0009"
+down_revision: Union[str, Sequence[str], None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _recreate(start: str, end: str, start_expr: str, end_expr: str) -> None:
+    # policy_summary es derivada de policy: se recrea con el nuevo grano y se recarga
+    # (misma agregación que app.policy_summary.rebuild, con las escrituras de pólizas bloqueadas)
+    op.execute("LOCK TABLE policy IN SHARE MODE")
+    op.execute("DROP TABLE IF EXISTS policy_summary")
+    op.create_table(
+        "policy_summary",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("product_id", sa.String(50), nullable=False),
+        sa.Column("status", sa.String(50)),
+        sa.Column("agent_id", sa.String(50)),
+        sa.Column(start, sa.Date()),
+        sa.Column(end, sa.Date()),
+        sa.Column("policy_count", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("premium_total", sa.Numeric(18, 2), nullable=False, server_default="0"),
+        sa.Column("sum_insured_total", sa.Numeric(20, 2), nullable=False, server_default="0"),
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX ux_policy_summary_key ON policy_summary "
+        "(product_id, coalesce(status, ''), coalesce(agent_id, ''), "
+        f"coalesce({start}, '-infinity'::date), coalesce({end}, '-infinity'::date))"
+    )
+    op.execute(
+        f"INSERT INTO policy_summary (product_id, status, agent_id, {start}, {end}, "
+        "policy_count, premium_total, sum_insured_total) "
+        f"SELECT product_id, nullif(status, ''), nullif(agent_id, ''), {start_expr}, {end_expr}, "
+        "count(*), coalesce(sum(premium), 0), coalesce(sum(sum_insured), 0) "
+        "FROM policy GROUP BY 1, 2, 3, 4, 5"
+    )
+
+
+def upgrade() -> None:
+    _recreate(
+        "start_month", "end_month",
+        "date_trunc('month', start_date)::date", "date_trunc('month', end_date)::date",
+    )
+
+
+def downgrade() -> None:
+    _recreate("start_date", "end_date", "start_date", "end_date")